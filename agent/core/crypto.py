@@ -2,54 +2,152 @@
 import os
 import json
 import base64
+import binascii
+import hmac
 import hashlib
-from typing import Dict, Any, Union, Optional
-from cryptography.fernet import Fernet
+import functools
+import threading
+from typing import Dict, Any, Union, Optional, BinaryIO, Tuple
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 
+# NumPy is optional; it vectorizes the XOR used for string obfuscation
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# orjson is optional; it is a faster drop-in for the JSON message path
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+NONCE_SIZE = 12
+HASH_CHUNK_SIZE = 64 * 1024
+KDF_SALT = b'c2_agent_salt'  # In production, use random salt
+KDF_ITERATIONS = 100000
+
+
+@functools.lru_cache(maxsize=32)
+def _derive_key(key: str) -> bytes:
+    """Derive a 32-byte key with PBKDF2-SHA256, cached per input key"""
+    return hashlib.pbkdf2_hmac('sha256', key.encode(), KDF_SALT, KDF_ITERATIONS, dklen=32)
+
+
+def _json_dumps(data: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which json handles
+            pass
+    return json.dumps(data).encode('utf-8')
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def _xor_with_key(data: bytes, key: bytes) -> bytes:
+    """XOR data with a repeating key"""
+    if not data or not key:
+        return bytes(data)
+    
+    if NUMPY_AVAILABLE:
+        data_arr = np.frombuffer(data, dtype=np.uint8)
+        key_arr = np.resize(np.frombuffer(key, dtype=np.uint8), data_arr.size)
+        return np.bitwise_xor(data_arr, key_arr).tobytes()
+    
+    # Repeat the key to the data length and XOR as big integers
+    size = len(data)
+    keystream = (key * (size // len(key) + 1))[:size]
+    result = int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')
+    return result.to_bytes(size, 'big')
+
 
 class CryptoManager:
     """Handles all cryptographic operations for the agent"""
     
     def __init__(self, key: str):
         self.key = key
-        self.fernet = self._create_fernet(key)
-        self.session_key = None
+        self.cipher = self._create_cipher(key)
+        self._session_key = None
+        self._session_cipher = None
         self.rsa_private_key = None
         self.rsa_public_key = None
         self.server_public_key = None
         
-    def _create_fernet(self, key: str) -> Fernet:
-        """Create Fernet instance from key"""
+        # Generate the RSA key pair in the background so it is ready by
+        # the first handshake instead of stalling get_public_key_pem
+        self._keygen_event = threading.Event()
+        self._keygen_lock = threading.Lock()
+        self._keygen_thread = threading.Thread(target=self._background_keygen, daemon=True)
+        self._keygen_thread.start()
+        
+    def _create_cipher(self, key: str) -> AESGCM:
+        """Create AES-256-GCM cipher from key"""
         # Derive a proper key from the provided string
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'c2_agent_salt',  # In production, use random salt
-            iterations=100000,
-            backend=default_backend()
-        )
-        key_bytes = base64.urlsafe_b64encode(kdf.derive(key.encode()))
-        return Fernet(key_bytes)
+        return AESGCM(_derive_key(key))
     
-    def generate_rsa_keypair(self, key_size: int = 2048):
-        """Generate RSA key pair"""
-        self.rsa_private_key = rsa.generate_private_key(
+    @staticmethod
+    def _seal(cipher: AESGCM, data: bytes) -> str:
+        """Encrypt with a fresh nonce and return base64(nonce + ciphertext)"""
+        nonce = os.urandom(NONCE_SIZE)
+        encrypted = cipher.encrypt(nonce, data, None)
+        return binascii.b2a_base64(nonce + encrypted, newline=False).decode('ascii')
+    
+    @staticmethod
+    def _open(cipher: AESGCM, encrypted_data: Union[str, bytes]) -> bytes:
+        """Reverse of _seal"""
+        encrypted_bytes = memoryview(binascii.a2b_base64(encrypted_data))
+        return cipher.decrypt(encrypted_bytes[:NONCE_SIZE], encrypted_bytes[NONCE_SIZE:], None)
+    
+    @staticmethod
+    def _new_rsa_key(key_size: int):
+        """Generate a fresh RSA private key"""
+        return rsa.generate_private_key(
             public_exponent=65537,
             key_size=key_size,
             backend=default_backend()
         )
-        self.rsa_public_key = self.rsa_private_key.public_key()
+    
+    def _background_keygen(self):
+        """Install a default key pair unless one was generated explicitly first"""
+        try:
+            private_key = self._new_rsa_key(2048)
+            with self._keygen_lock:
+                if self.rsa_private_key is None:
+                    self.rsa_private_key = private_key
+                    self.rsa_public_key = private_key.public_key()
+        finally:
+            self._keygen_event.set()
+    
+    def generate_rsa_keypair(self, key_size: int = 2048):
+        """Generate RSA key pair"""
+        try:
+            private_key = self._new_rsa_key(key_size)
+            with self._keygen_lock:
+                self.rsa_private_key = private_key
+                self.rsa_public_key = private_key.public_key()
+        finally:
+            self._keygen_event.set()
     
     def get_public_key_pem(self) -> str:
         """Get public key in PEM format"""
+        self._keygen_event.wait()
         if not self.rsa_public_key:
             self.generate_rsa_keypair()
         
-        pem = self.rsa_public_key.public_key_bytes(
+        pem = self.rsa_public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
@@ -63,24 +161,22 @@ class CryptoManager:
         )
     
     def encrypt_data(self, data: Union[str, bytes, dict]) -> str:
-        """Encrypt data using Fernet"""
+        """Encrypt data using AES-GCM"""
         if isinstance(data, dict):
-            data = json.dumps(data)
-        if isinstance(data, str):
+            data = _json_dumps(data)
+        elif isinstance(data, str):
             data = data.encode('utf-8')
         
-        encrypted = self.fernet.encrypt(data)
-        return base64.b64encode(encrypted).decode('utf-8')
+        return self._seal(self.cipher, data)
     
     def decrypt_data(self, encrypted_data: str) -> Union[str, dict]:
-        """Decrypt data using Fernet"""
+        """Decrypt data using AES-GCM"""
         try:
-            encrypted_bytes = base64.b64decode(encrypted_data)
-            decrypted = self.fernet.decrypt(encrypted_bytes)
+            decrypted = self._open(self.cipher, encrypted_data)
             
             # Try to parse as JSON
             try:
-                return json.loads(decrypted.decode('utf-8'))
+                return _json_loads(decrypted)
             except json.JSONDecodeError:
                 return decrypted.decode('utf-8')
                 
@@ -105,6 +201,7 @@ class CryptoManager:
     
     def decrypt_with_rsa(self, encrypted_data: bytes) -> bytes:
         """Decrypt data with RSA private key"""
+        self._keygen_event.wait()
         if not self.rsa_private_key:
             raise Exception("No RSA private key available")
         
@@ -118,81 +215,111 @@ class CryptoManager:
         )
         return decrypted
     
+    def encrypt_hybrid(self, data: bytes, public_key=None) -> Tuple[bytes, bytes, bytes]:
+        """Encrypt data with a one-time AES-GCM key wrapped by RSA-OAEP
+        
+        Returns (wrapped_key, nonce, ciphertext). Use this instead of
+        encrypt_with_rsa for anything larger than a key.
+        """
+        data_key = AESGCM.generate_key(bit_length=256)
+        wrapped_key = self.encrypt_with_rsa(data_key, public_key)
+        
+        nonce = os.urandom(NONCE_SIZE)
+        ciphertext = AESGCM(data_key).encrypt(nonce, data, None)
+        return wrapped_key, nonce, ciphertext
+    
+    def decrypt_hybrid(self, wrapped_key: bytes, nonce: bytes, ciphertext: bytes) -> bytes:
+        """Decrypt data produced by encrypt_hybrid"""
+        data_key = self.decrypt_with_rsa(wrapped_key)
+        return AESGCM(data_key).decrypt(nonce, ciphertext, None)
+    
     def generate_session_key(self) -> str:
         """Generate a new session key"""
-        self.session_key = Fernet.generate_key()
+        self.session_key = AESGCM.generate_key(bit_length=256)
         return base64.b64encode(self.session_key).decode('utf-8')
     
+    @property
+    def session_key(self) -> Optional[bytes]:
+        return self._session_key
+    
+    @session_key.setter
+    def session_key(self, session_key: Optional[bytes]):
+        """Set the session key and rebuild the cached cipher"""
+        self._session_key = session_key
+        self._session_cipher = AESGCM(session_key) if session_key else None
+    
     def encrypt_session(self, data: Union[str, bytes, dict]) -> str:
         """Encrypt data with session key"""
         if not self.session_key:
             raise Exception("No session key available")
         
-        fernet = Fernet(self.session_key)
-        
         if isinstance(data, dict):
-            data = json.dumps(data)
-        if isinstance(data, str):
+            data = _json_dumps(data)
+        elif isinstance(data, str):
             data = data.encode('utf-8')
         
-        encrypted = fernet.encrypt(data)
-        return base64.b64encode(encrypted).decode('utf-8')
+        return self._seal(self._session_cipher, data)
     
     def decrypt_session(self, encrypted_data: str) -> Union[str, dict]:
         """Decrypt data with session key"""
         if not self.session_key:
             raise Exception("No session key available")
         
-        fernet = Fernet(self.session_key)
-        
         try:
-            encrypted_bytes = base64.b64decode(encrypted_data)
-            decrypted = fernet.decrypt(encrypted_bytes)
+            decrypted = self._open(self._session_cipher, encrypted_data)
             
             # Try to parse as JSON
             try:
-                return json.loads(decrypted.decode('utf-8'))
+                return _json_loads(decrypted)
             except json.JSONDecodeError:
                 return decrypted.decode('utf-8')
                 
         except Exception as e:
             raise Exception(f"Session decryption failed: {e}")
     
-    def compute_hash(self, data: Union[str, bytes]) -> str:
-        """Compute SHA256 hash of data"""
+    def _digest(self, data: Union[str, bytes, BinaryIO]) -> bytes:
+        """Compute raw SHA256 digest of data or a binary file-like object"""
         if isinstance(data, str):
             data = data.encode('utf-8')
         
-        digest = hashlib.sha256(data).hexdigest()
-        return digest
+        if not hasattr(data, 'read'):
+            return hashlib.sha256(data).digest()
+        
+        # file_digest (3.11+) reads into one reusable buffer
+        if hasattr(hashlib, 'file_digest'):
+            try:
+                return hashlib.file_digest(data, 'sha256').digest()
+            except (AttributeError, ValueError):
+                pass
+        
+        hasher = hashlib.sha256()
+        for chunk in iter(lambda: data.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+        return hasher.digest()
+    
+    def compute_hash(self, data: Union[str, bytes, BinaryIO]) -> str:
+        """Compute SHA256 hash of data"""
+        return self._digest(data).hex()
     
-    def verify_hash(self, data: Union[str, bytes], expected_hash: str) -> bool:
+    def verify_hash(self, data: Union[str, bytes, BinaryIO], expected_hash: str) -> bool:
         """Verify data against expected hash"""
-        computed_hash = self.compute_hash(data)
-        return computed_hash == expected_hash
+        try:
+            expected = bytes.fromhex(expected_hash)
+        except ValueError:
+            return False
+        return hmac.compare_digest(self._digest(data), expected)
     
     def obfuscate_string(self, data: str) -> str:
         """Simple string obfuscation (not cryptographically secure)"""
         # XOR with key
-        key_bytes = self.key.encode('utf-8')
-        data_bytes = data.encode('utf-8')
-        
-        result = bytearray()
-        for i, byte in enumerate(data_bytes):
-            result.append(byte ^ key_bytes[i % len(key_bytes)])
-        
+        result = _xor_with_key(data.encode('utf-8'), self.key.encode('utf-8'))
         return base64.b64encode(result).decode('utf-8')
     
     def deobfuscate_string(self, obfuscated: str) -> str:
         """Deobfuscate string"""
         try:
             data_bytes = base64.b64decode(obfuscated)
-            key_bytes = self.key.encode('utf-8')
-            
-            result = bytearray()
-            for i, byte in enumerate(data_bytes):
-                result.append(byte ^ key_bytes[i % len(key_bytes)])
-            
+            result = _xor_with_key(data_bytes, self.key.encode('utf-8'))
             return result.decode('utf-8')
         except Exception:
             return obfuscated
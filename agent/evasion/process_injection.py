@@ -9,6 +9,21 @@ import ctypes.wintypes
 import struct
 from typing import Optional, List
 
+
+class PROCESSENTRY32(ctypes.Structure):
+    _fields_ = [
+        ('dwSize', ctypes.wintypes.DWORD),
+        ('cntUsage', ctypes.wintypes.DWORD),
+        ('th32ProcessID', ctypes.wintypes.DWORD),
+        ('th32DefaultHeapID', ctypes.POINTER(ctypes.wintypes.ULONG)),
+        ('th32ModuleID', ctypes.wintypes.DWORD),
+        ('cntThreads', ctypes.wintypes.DWORD),
+        ('th32ParentProcessID', ctypes.wintypes.DWORD),
+        ('pcPriClassBase', ctypes.wintypes.LONG),
+        ('dwFlags', ctypes.wintypes.DWORD),
+        ('szExeFile', ctypes.c_char * 260)
+    ]
+
 class ProcessInjection:
     """Various process injection techniques"""
     
@@ -31,21 +46,6 @@ class ProcessInjection:
         """Get list of running processes"""
         processes = []
         
-        # Define PROCESSENTRY32 structure
-        class PROCESSENTRY32(ctypes.Structure):
-            _fields_ = [
-                ('dwSize', ctypes.wintypes.DWORD),
-                ('cntUsage', ctypes.wintypes.DWORD),
-                ('th32ProcessID', ctypes.wintypes.DWORD),
-                ('th32DefaultHeapID', ctypes.POINTER(ctypes.wintypes.ULONG)),
-                ('th32ModuleID', ctypes.wintypes.DWORD),
-                ('cntThreads', ctypes.wintypes.DWORD),
-                ('th32ParentProcessID', ctypes.wintypes.DWORD),
-                ('pcPriClassBase', ctypes.wintypes.LONG),
-                ('dwFlags', ctypes.wintypes.DWORD),
-                ('szExeFile', ctypes.c_char * 260)
-            ]
-        
         # Create snapshot
         h_snapshot = self.kernel32.CreateToolhelp32Snapshot(0x00000002, 0)
         if h_snapshot == -1:
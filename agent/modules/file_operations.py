@@ -1,13 +1,234 @@
 # agent/modules/file_operations.py
 import os
+import re
+import fnmatch
 import shutil
+import mmap
 import hashlib
-import base64
 import zipfile
+import zlib
 import tempfile
-from typing import Dict, Any, List, Optional
+import errno
+import stat as stat_mod
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, Callable, Union
 from datetime import datetime
 
+# fcntl is POSIX only; it is needed for reflink copies
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# pybase64 is optional; it is a SIMD drop-in for the stdlib base64 codec
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# BLAKE3 is optional; the extension hashes with SIMD across multiple threads
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+HASH_CHUNK_SIZE = 1024 * 1024
+READ_AHEAD_MIN_SIZE = 8 * HASH_CHUNK_SIZE
+READ_AHEAD_DEPTH = 4
+ZIP_PARALLEL_MAX_SIZE = 4 * 1024 * 1024
+ZIP_WORKERS = min(8, os.cpu_count() or 1)
+# Uncompressed bytes allowed in flight; each pending member holds its input
+# and deflated output in memory until it is written
+ZIP_WINDOW_MAX_BYTES = 16 * 1024 * 1024
+SEARCH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+ZIP_COMPRESSION_METHODS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA
+}
+COPY_BUFFER_SIZE = 1024 * 1024
+UNZIP_MAX_RATIO = 100
+FILE_FLAG_DIR = 1
+FILE_FLAG_FILE = 2
+FILE_FLAG_LINK = 4
+FICLONE = 0x40049409  # _IOW(0x94, 9, int)
+_FAST_COPY_ERRNOS = frozenset((errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF))
+# Only members that expand past this are ratio-checked; ordinary text
+# deflates well beyond UNZIP_MAX_RATIO and is harmless at this size
+UNZIP_RATIO_MIN_SIZE = 64 * 1024 * 1024
+
+_CRITICAL_PATH_LIST = (
+    '/', '/bin', '/boot', '/dev', '/etc', '/lib', '/lib64',
+    '/proc', '/root', '/sbin', '/sys', '/usr', '/var',
+    'C:\\', 'C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)',
+    'C:\\ProgramData', 'C:\\Users\\All Users'
+)
+# Keep both spellings, since e.g. /lib is often a symlink to /usr/lib;
+# paths foreign to this platform are not absolute and are only normalized
+CRITICAL_PATHS = frozenset(
+    os.path.normcase(p)
+    for critical in _CRITICAL_PATH_LIST
+    for p in (os.path.normpath(critical),
+              os.path.realpath(critical) if os.path.isabs(critical) else critical)
+)
+
+
+def _read_ahead(f, chunk_size: int = HASH_CHUNK_SIZE, depth: int = READ_AHEAD_DEPTH) -> Iterator[memoryview]:
+    """Yield chunks of f while a background thread keeps up to depth reads in flight
+    
+    Each yielded view is only valid until the next one is requested.
+    """
+    free = queue.Queue()
+    full = queue.Queue()
+    for _ in range(depth):
+        free.put(bytearray(chunk_size))
+    
+    def reader():
+        try:
+            while True:
+                buf = free.get()
+                if buf is None:
+                    return
+                n = f.readinto(buf)
+                full.put((buf, n))
+                if not n:
+                    return
+        except Exception as e:
+            full.put((e, 0))
+    
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            buf, n = full.get()
+            if isinstance(buf, Exception):
+                raise buf
+            if not n:
+                break
+            yield memoryview(buf)[:n]
+            free.put(buf)
+    finally:
+        free.put(None)
+        thread.join()
+
+
+def _copy_file_fast(src: str, dst: str) -> str:
+    """shutil.copy2 that copies inside the kernel where possible
+    
+    Tries a reflink (FICLONE), which shares extents on btrfs/xfs, then
+    os.copy_file_range, and falls back to shutil.copy2 otherwise.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    
+    st = os.stat(src)
+    # Empty or synthetic (e.g. /proc) files report no size to copy
+    if (not hasattr(os, 'copy_file_range') or not stat_mod.S_ISREG(st.st_mode) or not st.st_size
+            or (os.path.exists(dst) and os.path.samefile(src, dst))):
+        return shutil.copy2(src, dst)
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        copied = _copy_fd_in_kernel(fsrc.fileno(), fdst.fileno(), st.st_size)
+    if not copied:
+        return shutil.copy2(src, dst)
+    
+    shutil.copystat(src, dst)
+    return dst
+
+
+def _copy_fd_in_kernel(src_fd: int, dst_fd: int, size: int) -> bool:
+    """Copy size bytes between descriptors without a userspace buffer, False if unsupported"""
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return True
+        except OSError:
+            pass
+    
+    offset = 0
+    try:
+        while offset < size:
+            n = os.copy_file_range(src_fd, dst_fd, size - offset)
+            if not n:
+                break
+            offset += n
+    except OSError as e:
+        if e.errno in _FAST_COPY_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _fadvise(fd: int, advice: str):
+    """Give the kernel an access-pattern hint where posix_fadvise exists"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _file_times(stat: os.stat_result) -> tuple:
+    """Format (mtime, ctime, atime) as ISO 8601, formatting equal timestamps once"""
+    # Most files never have their metadata or access time touched after the
+    # last write, so the three timestamps are usually identical
+    fromtimestamp = datetime.fromtimestamp
+    mtime = fromtimestamp(stat.st_mtime).isoformat()
+    ctime = mtime if stat.st_ctime == stat.st_mtime else fromtimestamp(stat.st_ctime).isoformat()
+    if stat.st_atime == stat.st_mtime:
+        atime = mtime
+    elif stat.st_atime == stat.st_ctime:
+        atime = ctime
+    else:
+        atime = fromtimestamp(stat.st_atime).isoformat()
+    return mtime, ctime, atime
+
+
+def _deflate_file(path: str, level: int = zlib.Z_DEFAULT_COMPRESSION) -> tuple:
+    """Read and raw-deflate a whole file, returning (size, crc32, deflated)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return len(data), zlib.crc32(data), compressor.compress(data) + compressor.flush()
+
+
+# ZipFile internals _write_deflated relies on; zipfile has no public API for
+# appending data that is already compressed
+_ZIPFILE_WRITE_INTERNALS = ('_lock', '_writecheck', '_didModify', 'fp', 'filelist', 'NameToInfo', 'start_dir')
+
+
+def _can_write_deflated(zf: zipfile.ZipFile) -> bool:
+    """Whether this zipfile exposes the internals _write_deflated needs"""
+    return all(hasattr(zf, name) for name in _ZIPFILE_WRITE_INTERNALS) and \
+        hasattr(zipfile.ZipInfo, 'FileHeader')
+
+
+def _write_deflated(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, size: int, crc: int, deflated: bytes):
+    """Append an already deflated member to a ZipFile open for writing
+    
+    Only call this when _can_write_deflated(zf) is true.
+    """
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = size
+    zinfo.compress_size = len(deflated)
+    zinfo.CRC = crc
+    
+    # Same bookkeeping as ZipFile.writestr, minus the compression
+    with zf._lock:
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        zinfo.header_offset = zf.fp.tell()
+        zf.fp.write(zinfo.FileHeader())
+        zf.fp.write(deflated)
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.start_dir = zf.fp.tell()
+
 
 class FileOperations:
     """File operations module"""
@@ -42,76 +263,126 @@ class FileOperations:
         else:
             return {'success': False, 'error': f'Unknown command: {command}'}
     
-    def list_files(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """List files in directory with details"""
+    def list_files(self, params: Dict[str, Any]) -> Union[List[Dict[str, Any]], Dict[str, list]]:
+        """List files in directory with details
+        
+        With 'columnar' set, returns parallel lists (path, size, mode, mtime,
+        flags) with raw stat values instead of one dict per file; this is far
+        smaller and faster to serialize for large listings.
+        """
         path = params.get('path', '.')
         recursive = params.get('recursive', False)
-        pattern = params.get('pattern', '*')
-        
-        files = []
+        match = self._compile_pattern(params.get('pattern', '*'))
+        columnar = params.get('columnar', False)
         
         if recursive:
-            # Recursive listing
-            for root, dirs, filenames in os.walk(path):
-                # Limit depth to prevent excessive recursion
-                depth = root[len(path):].count(os.sep)
-                if depth > params.get('max_depth', 3):
-                    dirs[:] = []  # Don't recurse further
-                    continue
-                
-                for name in filenames:
-                    full_path = os.path.join(root, name)
-                    if self._match_pattern(name, pattern):
-                        files.append(self._get_file_info(full_path))
-                
-                for name in dirs:
-                    full_path = os.path.join(root, name)
-                    if self._match_pattern(name, pattern):
-                        files.append(self._get_file_info(full_path))
-        else:
-            # Non-recursive listing
-            try:
-                for name in os.listdir(path):
-                    if self._match_pattern(name, pattern):
-                        full_path = os.path.join(path, name)
-                        files.append(self._get_file_info(full_path))
-            except PermissionError:
-                raise Exception(f"Permission denied: {path}")
+            # Recursive listing, depth limited to prevent excessive recursion
+            return self._collect_file_info(
+                self._scandir_recursive(path, params.get('max_depth', 3)), match, columnar)
         
-        return files
+        # Non-recursive listing
+        try:
+            with os.scandir(path) as it:
+                return self._collect_file_info(it, match, columnar)
+        except PermissionError:
+            raise Exception(f"Permission denied: {path}")
+    
+    def _collect_file_info(self, entries: Iterator[os.DirEntry], match: Callable[[str], Any],
+                           columnar: bool) -> Union[List[Dict[str, Any]], Dict[str, list]]:
+        """Build list_files output from the entries whose names match"""
+        if columnar:
+            files = {'path': [], 'size': [], 'mode': [], 'mtime': [], 'flags': []}
+            add = self._add_file_columns
+            for entry in entries:
+                if match(entry.name):
+                    add(files, entry)
+            return files
+        
+        get_info = self._get_file_info
+        return [get_info(entry) for entry in entries if match(entry.name)]
+    
+    def _scandir_recursive(self, path: str, max_depth: Optional[int] = None) -> Iterator[os.DirEntry]:
+        """Yield directory entries top-down, without following directory symlinks"""
+        # An explicit stack avoids resuming a chain of nested generators per entry;
+        # subdirectories are pushed in reverse so the order matches recursion
+        stack = [(path, 0)]
+        pop = stack.pop
+        while stack:
+            current, depth = pop()
+            # Decide up front whether to descend, so leaf levels skip the type checks
+            descend = max_depth is None or depth < max_depth
+            subdirs = []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        yield entry
+                        if descend:
+                            try:
+                                if entry.is_dir() and not entry.is_symlink():
+                                    subdirs.append((entry.path, depth + 1))
+                            except OSError:
+                                pass
+            except OSError:
+                # Unreadable directories are skipped, as os.walk does
+                continue
+            
+            subdirs.reverse()
+            stack.extend(subdirs)
     
-    def _match_pattern(self, name: str, pattern: str) -> bool:
-        """Match filename against pattern"""
+    def _compile_pattern(self, pattern: str) -> Callable[[str], Any]:
+        """Compile a glob pattern once into a filename matcher"""
         if pattern == '*':
-            return True
+            return lambda name: True
         
-        import fnmatch
-        return fnmatch.fnmatch(name, pattern)
+        # fnmatch.fnmatch normcases both sides; fold case the same way here
+        flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+        return re.compile(fnmatch.translate(pattern), flags).match
     
-    def _get_file_info(self, path: str) -> Dict[str, Any]:
-        """Get file information"""
+    def _get_file_info(self, entry: os.DirEntry) -> Dict[str, Any]:
+        """Get file information from a directory entry"""
         try:
-            stat = os.stat(path)
+            # Type checks use the d_type cached by scandir; only stat() hits the disk
+            stat = entry.stat()
+            modified, created, accessed = _file_times(stat)
             
             return {
-                'path': path,
-                'name': os.path.basename(path),
+                'path': entry.path,
+                'name': entry.name,
                 'size': stat.st_size,
-                'isDirectory': os.path.isdir(path),
-                'isFile': os.path.isfile(path),
-                'isLink': os.path.islink(path),
-                'permissions': oct(stat.st_mode)[-3:],
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                'accessed': datetime.fromtimestamp(stat.st_atime).isoformat()
+                'isDirectory': entry.is_dir(),
+                'isFile': entry.is_file(),
+                'isLink': entry.is_symlink(),
+                'permissions': '%03o' % (stat.st_mode & 0o777),
+                'modified': modified,
+                'created': created,
+                'accessed': accessed
             }
         except:
             return {
-                'path': path,
-                'name': os.path.basename(path),
+                'path': entry.path,
+                'name': entry.name,
                 'error': 'Unable to stat file'
             }
     
+    def _add_file_columns(self, columns: Dict[str, list], entry: os.DirEntry):
+        """Append a directory entry to columnar listing output"""
+        columns['path'].append(entry.path)
+        try:
+            stat = entry.stat()
+            flags = ((FILE_FLAG_DIR if entry.is_dir() else 0) |
+                     (FILE_FLAG_FILE if entry.is_file() else 0) |
+                     (FILE_FLAG_LINK if entry.is_symlink() else 0))
+            columns['size'].append(stat.st_size)
+            columns['mode'].append(stat.st_mode)
+            columns['mtime'].append(stat.st_mtime)
+            columns['flags'].append(flags)
+        except:
+            # Unstattable entries keep their row, with nulls
+            columns['size'].append(None)
+            columns['mode'].append(None)
+            columns['mtime'].append(None)
+            columns['flags'].append(None)
+    
     def read_file(self, params: Dict[str, Any]) -> str:
         """Read file contents"""
         path = params.get('path')
@@ -135,7 +406,16 @@ class FileOperations:
                     else:
                         data = f.read()
                     
-                    return base64.b64encode(data).decode('utf-8')
+                    return base64.b64encode(data).decode('ascii')
+            elif offset <= 0 and length <= 0:
+                # Whole-file text read: one decode pass instead of TextIOWrapper's
+                # incremental decoder, with the same universal-newline translation
+                with open(path, 'rb', buffering=0) as f:
+                    data = f.readall().decode(encoding, errors='replace')
+                
+                if '\r' in data:
+                    data = data.replace('\r\n', '\n').replace('\r', '\n')
+                return data
             else:
                 # Read as text
                 with open(path, 'r', encoding=encoding, errors='replace') as f:
@@ -228,18 +508,22 @@ class FileOperations:
     
     def _is_critical_path(self, path: str) -> bool:
         """Check if path is critical system path"""
-        critical_paths = [
-            '/', '/bin', '/boot', '/dev', '/etc', '/lib', '/lib64',
-            '/proc', '/root', '/sbin', '/sys', '/usr', '/var',
-            'C:\\', 'C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)',
-            'C:\\ProgramData', 'C:\\Users\\All Users'
-        ]
-        
+        # Resolve symlinks in the parent so a link into a critical directory
+        # cannot bypass the check; the last component is what gets removed,
+        # so a link itself is judged by its own location
         abs_path = os.path.abspath(path)
+        abs_path = os.path.normcase(os.path.join(os.path.realpath(os.path.dirname(abs_path)),
+                                                 os.path.basename(abs_path)))
+        if abs_path in CRITICAL_PATHS or os.path.dirname(abs_path) == abs_path:
+            return True
         
-        for critical in critical_paths:
-            if abs_path == critical or abs_path.startswith(critical + os.sep):
+        # Anything below a critical directory is critical, but a filesystem
+        # root only protects itself
+        parent = os.path.dirname(abs_path)
+        while os.path.dirname(parent) != parent:
+            if parent in CRITICAL_PATHS:
                 return True
+            parent = os.path.dirname(parent)
         
         return False
     
@@ -258,12 +542,12 @@ class FileOperations:
                 if os.path.exists(dst) and not overwrite:
                     raise Exception(f"Destination exists: {dst}")
                 
-                shutil.copytree(src, dst, dirs_exist_ok=overwrite)
+                shutil.copytree(src, dst, copy_function=_copy_file_fast, dirs_exist_ok=overwrite)
             else:
                 if os.path.exists(dst) and not overwrite:
                     raise Exception(f"Destination exists: {dst}")
                 
-                shutil.copy2(src, dst)
+                _copy_file_fast(src, dst)
             
             return {
                 'source': src,
@@ -327,9 +611,12 @@ class FileOperations:
             raise Exception("Path parameter required")
         
         try:
-            # Read file
-            with open(path, 'rb') as f:
-                data = f.read()
+            # Read file unbuffered; readall sizes one buffer from fstat and fills it directly
+            with open(path, 'rb', buffering=0) as f:
+                _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+                data = f.readall()
+                # The file is read once; don't let it crowd out the page cache
+                _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
             
             # Upload to C2
             filename = os.path.basename(path)
@@ -365,6 +652,7 @@ class FileOperations:
             os.makedirs(os.path.dirname(destination), exist_ok=True)
             
             with open(destination, 'wb') as f:
+                _fadvise(f.fileno(), 'POSIX_FADV_NOREUSE')
                 f.write(data)
             
             # Set permissions if specified
@@ -383,42 +671,72 @@ class FileOperations:
     def search_files(self, params: Dict[str, Any]) -> List[str]:
         """Search for files"""
         path = params.get('path', '.')
-        pattern = params.get('pattern', '*')
+        match = self._compile_pattern(params.get('pattern', '*'))
         content = params.get('content')
         max_results = params.get('max_results', 100)
         
         results = []
         count = 0
+        needle = content.encode('utf-8', 'ignore') if content else b''
+        
+        # Content checks block on disk, so run them on a pool while the walk
+        # continues; results are still collected in walk order
+        pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS) if content else None
+        pending = deque()
+        
+        def collect(limit):
+            nonlocal count
+            while len(pending) > limit and count < max_results:
+                full_path, future = pending.popleft()
+                if future.result():
+                    results.append(full_path)
+                    count += 1
         
         try:
-            for root, dirs, files in os.walk(path):
-                for name in files:
-                    if count >= max_results:
-                        break
-                    
-                    if self._match_pattern(name, pattern):
-                        full_path = os.path.join(root, name)
-                        
-                        # If content search is requested
-                        if content:
-                            try:
-                                with open(full_path, 'r', errors='ignore') as f:
-                                    if content in f.read():
-                                        results.append(full_path)
-                                        count += 1
-                            except:
-                                pass
-                        else:
-                            results.append(full_path)
-                            count += 1
-                
+            for entry in self._scandir_recursive(path):
                 if count >= max_results:
                     break
+                
+                try:
+                    if entry.is_dir():
+                        continue
+                except OSError:
+                    pass
+                
+                if match(entry.name):
+                    full_path = entry.path
+                    
+                    # If content search is requested
+                    if content:
+                        pending.append((full_path, pool.submit(self._check_content, full_path, needle)))
+                        collect(SEARCH_WORKERS * 2)
+                    else:
+                        results.append(full_path)
+                        count += 1
             
+            collect(0)
             return results
             
         except PermissionError:
             raise Exception(f"Permission denied: {path}")
+        finally:
+            if pool:
+                # Drop checks queued past max_results
+                for _, future in pending:
+                    future.cancel()
+                pool.shutdown()
+    
+    def _check_content(self, path: str, needle: bytes) -> bool:
+        """Check whether a file contains needle, searching a read-only mapping"""
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # Empty or synthetic (e.g. /proc) files cannot be mapped
+                    return needle in f.read()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm.find(needle) != -1
+        except:
+            return False
     
     def hash_file(self, params: Dict[str, Any]) -> Dict[str, str]:
         """Calculate file hashes"""
@@ -431,19 +749,38 @@ class FileOperations:
         try:
             hashes = {}
             
-            # Read file in chunks to handle large files
-            chunk_size = 8192
+            # BLAKE3 hashes the memory-mapped file itself, so skip the shared read
+            if BLAKE3_AVAILABLE and 'blake3' in algorithms:
+                h = blake3(max_threads=blake3.AUTO)
+                h.update_mmap(path)
+                hashes['blake3'] = h.hexdigest()
             
-            for algo in algorithms:
-                h = hashlib.new(algo)
-                
-                with open(path, 'rb') as f:
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        h.update(chunk)
-                
+            hashers = {algo: hashlib.new(algo) for algo in algorithms if algo not in hashes}
+            
+            # Read the file once and feed every digest from the same buffer
+            if hashers:
+                with open(path, 'rb', buffering=0) as f:
+                    _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+                    if os.fstat(f.fileno()).st_size >= READ_AHEAD_MIN_SIZE:
+                        # Large file: overlap the next reads with hashing the current chunk
+                        for chunk in _read_ahead(f):
+                            for h in hashers.values():
+                                h.update(chunk)
+                    elif len(hashers) == 1 and hasattr(hashlib, 'file_digest'):
+                        algo = next(iter(hashers))
+                        hashers[algo] = hashlib.file_digest(f, algo)
+                    else:
+                        buf = bytearray(HASH_CHUNK_SIZE)
+                        view = memoryview(buf)
+                        while True:
+                            n = f.readinto(buf)
+                            if not n:
+                                break
+                            for h in hashers.values():
+                                h.update(view[:n])
+                    _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
+            
+            for algo, h in hashers.items():
                 hashes[algo] = h.hexdigest()
             
             return hashes
@@ -454,54 +791,126 @@ class FileOperations:
             raise Exception(f"Permission denied: {path}")
     
     def zip_files(self, params: Dict[str, Any]) -> str:
-        """Create zip archive"""
+        """Create zip archive
+        
+        'compression' is one of stored, deflated (default), bzip2 or lzma.
+        'compresslevel' defaults to 3: deflate at level 1-3 runs several times
+        faster than the zlib default of 6 for archives only a few percent larger.
+        """
         paths = params.get('paths', [])
         output = params.get('output')
+        compression = params.get('compression', 'deflated')
+        compresslevel = params.get('compresslevel', 3)
         
         if not paths or not output:
             raise Exception("paths and output parameters required")
         
+        if compression not in ZIP_COMPRESSION_METHODS:
+            raise Exception(f"Unsupported compression: {compression}")
+        method = ZIP_COMPRESSION_METHODS[compression]
+        
+        # Collect members up front so they can be compressed out of order
+        members = []
+        for path in paths:
+            if os.path.isdir(path):
+                # Add directory recursively
+                for root, dirs, files in os.walk(path):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        members.append((file_path, os.path.relpath(file_path, os.path.dirname(path))))
+            else:
+                # Add single file
+                members.append((path, os.path.basename(path)))
+        
+        # None means the zlib default, as it does for ZipFile
+        level = zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel
+        
         try:
-            with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for path in paths:
-                    if os.path.isdir(path):
-                        # Add directory recursively
-                        for root, dirs, files in os.walk(path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arc_name = os.path.relpath(file_path, os.path.dirname(path))
-                                zf.write(file_path, arc_name)
-                    else:
-                        # Add single file
-                        zf.write(path, os.path.basename(path))
+            with zipfile.ZipFile(output, 'w', method, compresslevel=compresslevel) as zf, \
+                    ThreadPoolExecutor(max_workers=ZIP_WORKERS) as pool:
+                # zlib releases the GIL, so small members deflate in parallel
+                # while a window of results, bounded by count and by bytes,
+                # is written in order
+                window = deque()
+                window_bytes = 0
+                parallel = method == zipfile.ZIP_DEFLATED and _can_write_deflated(zf)
+                
+                def flush(max_count, max_bytes):
+                    nonlocal window_bytes
+                    while window and (len(window) > max_count or window_bytes > max_bytes):
+                        zinfo, future = window.popleft()
+                        window_bytes -= zinfo.file_size
+                        _write_deflated(zf, zinfo, *future.result())
+                
+                for file_path, arc_name in members:
+                    zinfo = zipfile.ZipInfo.from_file(file_path, arc_name)
+                    if not parallel or zinfo.file_size > ZIP_PARALLEL_MAX_SIZE:
+                        # Other methods, zipfiles without the internals we
+                        # need, and large files (to bound memory), go through
+                        # zipfile directly
+                        flush(0, 0)
+                        zf.write(file_path, arc_name)
+                        continue
+                    
+                    # Make room before submitting, so the new member counts too
+                    flush(ZIP_WORKERS * 2 - 1, ZIP_WINDOW_MAX_BYTES - zinfo.file_size)
+                    window.append((zinfo, pool.submit(_deflate_file, file_path, level)))
+                    window_bytes += zinfo.file_size
+                
+                flush(0, 0)
             
             return f"Archive created: {output}"
             
         except Exception as e:
             raise Exception(f"Zip creation failed: {e}")
     
-    def unzip_file(self, params: Dict[str, Any]) -> List[str]:
-        """Extract zip archive"""
+    def unzip_file(self, params: Dict[str, Any], skipped: Optional[List[Dict[str, str]]] = None) -> List[str]:
+        """Extract zip archive
+        
+        Members that expand more than 'max_ratio' times (default
+        UNZIP_MAX_RATIO, 0 disables the check) or that would land outside
+        the destination are not extracted; pass a list as skipped to
+        collect them.
+        """
         archive = params.get('archive')
         destination = params.get('destination', '.')
+        max_ratio = params.get('max_ratio', UNZIP_MAX_RATIO)
         
         if not archive:
             raise Exception("archive parameter required")
         
+        if skipped is None:
+            skipped = []
+        
         try:
             extracted = []
+            real_destination = os.path.realpath(destination)
             
             with zipfile.ZipFile(archive, 'r') as zf:
+                infos = zf.infolist()
+                
                 # Check for zip bombs
-                total_size = sum(info.file_size for info in zf.infolist())
+                total_size = sum(info.file_size for info in infos)
                 if total_size > 1024 * 1024 * 1024:  # 1GB limit
                     raise Exception("Archive too large (possible zip bomb)")
                 
                 # Extract files
-                for info in zf.infolist():
-                    # Sanitize path to prevent directory traversal
+                for info in infos:
+                    # Sanitize path to prevent directory traversal, including
+                    # drive-relative names and symlinks already in destination
                     safe_path = os.path.normpath(info.filename)
-                    if os.path.isabs(safe_path) or '..' in safe_path:
+                    target = os.path.realpath(os.path.join(destination, safe_path))
+                    if os.path.isabs(safe_path) or '..' in safe_path or \
+                            os.path.commonpath([real_destination, target]) != real_destination:
+                        skipped.append({'name': info.filename, 'reason': 'Path outside destination'})
+                        continue
+                    
+                    if max_ratio and info.file_size > UNZIP_RATIO_MIN_SIZE and \
+                            info.file_size > max_ratio * info.compress_size:
+                        skipped.append({
+                            'name': info.filename,
+                            'reason': 'Suspicious compression ratio (possible zip bomb)'
+                        })
                         continue
                     
                     zf.extract(info, destination)
@@ -522,6 +931,7 @@ class FileOperations:
         
         try:
             stat = os.stat(path)
+            mtime, ctime, atime = _file_times(stat)
             
             info = {
                 'path': path,
@@ -530,9 +940,9 @@ class FileOperations:
                 'mode': oct(stat.st_mode),
                 'uid': stat.st_uid,
                 'gid': stat.st_gid,
-                'atime': datetime.fromtimestamp(stat.st_atime).isoformat(),
-                'mtime': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'ctime': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                'atime': atime,
+                'mtime': mtime,
+                'ctime': ctime,
                 'isFile': os.path.isfile(path),
                 'isDir': os.path.isdir(path),
                 'isLink': os.path.islink(path),
@@ -1,19 +1,147 @@
 # agent/modules/network_tools.py
 import os
+import re
+import time
+import shutil
 import socket
-import struct
+import selectors
+import threading
 import subprocess
 import platform
 import psutil
 import ipaddress
-from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# pyroute2 is optional; it reads routes and neighbours over netlink on Linux
+try:
+    from pyroute2 import IPRoute
+    PYROUTE2_AVAILABLE = True
+except ImportError:
+    PYROUTE2_AVAILABLE = False
+
+_IS_WINDOWS = platform.system() == 'Windows'
+
+PORT_SCAN_WORKERS = 256
+PORT_SCAN_MAX_SOCKETS = 512  # select() on Windows handles at most 512 sockets
+HOST_SWEEP_WORKERS = 64
+TRACEROUTE_PTR_WORKERS = 16
+NUD_PERMANENT = 0x80
+
+_ARP_LINE_RE = re.compile(r'\(([^)]+)\) at ([0-9a-fA-F:]+)')
+_PING_STATS_RE = re.compile(r'\d+')
+_RTT_STATS_RE = re.compile(r'[\d.]+')
+
+COMMON_PORTS = {
+    21: 'FTP',
+    22: 'SSH',
+    23: 'Telnet',
+    25: 'SMTP',
+    53: 'DNS',
+    80: 'HTTP',
+    110: 'POP3',
+    143: 'IMAP',
+    443: 'HTTPS',
+    445: 'SMB',
+    3306: 'MySQL',
+    3389: 'RDP',
+    5432: 'PostgreSQL',
+    5900: 'VNC',
+    8080: 'HTTP-Alt',
+    8443: 'HTTPS-Alt'
+}
+
+# Services that send a greeting as soon as the connection opens
+GREETING_SERVICES = frozenset(('FTP', 'SSH', 'SMTP', 'POP3', 'IMAP', 'MySQL', 'VNC'))
+HTTP_SERVICES = frozenset(('HTTP', 'HTTPS', 'HTTP-Alt', 'HTTPS-Alt'))
+HTTP_PROBE = b'HEAD / HTTP/1.0\r\n\r\n'
+BANNER_GREETING_TIMEOUT = 0.3
+
+# Single-echo ping used by the list_hosts sweep
+_PROBE_PING_CMD = ['ping', '-n', '1', '-w', '100'] if _IS_WINDOWS else ['ping', '-c', '1', '-W', '1']
+
+
+def _parse_services() -> Dict[int, str]:
+    """Read TCP port names from the system services file"""
+    if _IS_WINDOWS:
+        path = os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'System32', 'drivers', 'etc', 'services')
+    else:
+        path = '/etc/services'
+    
+    services = {}
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            for line in f:
+                parts = line.split('#', 1)[0].split()
+                if len(parts) < 2:
+                    continue
+                port, _, proto = parts[1].partition('/')
+                if proto == 'tcp' and port.isdigit():
+                    # Upper-case to match the COMMON_PORTS spelling ('ssh' -> 'SSH')
+                    services.setdefault(int(port), parts[0].upper())
+    except OSError:
+        pass
+    return services
+
+
+# Parsed once at import; the well-known names above take precedence
+_SERVICES = {**_parse_services(), **COMMON_PORTS}
+
+
+def _hex_le_to_ip(value: str) -> str:
+    """Convert a little-endian hex address from /proc/net to dotted quad"""
+    v = int(value, 16)
+    return f"{v & 0xff}.{(v >> 8) & 0xff}.{(v >> 16) & 0xff}.{(v >> 24) & 0xff}"
+
+
+def _parse_hop(line: str) -> Optional[Tuple[int, List[str], List[float]]]:
+    """Parse a traceroute/tracert hop line into (hop, ips, rtts) in one pass"""
+    tokens = line.split()
+    if not tokens:
+        return None
+    
+    # Hop number is the leading run of digits
+    first = tokens[0]
+    end = 0
+    while end < len(first) and first[end] in '0123456789':
+        end += 1
+    if not end:
+        return None
+    
+    ips = []
+    rtts = []
+    prev = ''
+    for token in tokens:
+        if token == 'ms' or token.endswith('ms'):
+            # "0.412 ms", "12ms" or tracert's "<1 ms"
+            value = prev if token == 'ms' else token[:-2]
+            try:
+                rtts.append(float(value.lstrip('<')))
+            except ValueError:
+                pass
+        else:
+            candidate = token.strip('()[]')
+            if candidate.count('.') == 3 and all(part.isdigit() for part in candidate.split('.')):
+                ips.append(candidate)
+        prev = token
+    
+    return int(first[:end]), ips, rtts
 
 
 class NetworkTools:
     """Network tools and utilities module"""
     
-    def __init__(self, agent):
+    def __init__(self, agent, dns_cache_ttl: float = 300.0):
         self.agent = agent
+        self.dns_cache_ttl = dns_cache_ttl
+        self._dns_cache: Dict[tuple, tuple] = {}
+        self._dns_lock = threading.Lock()
         self.commands = {
             'interfaces': self.list_interfaces,
             'connections': self.list_connections,
@@ -28,6 +156,20 @@ class NetworkTools:
             'forward': self.port_forward
         }
     
+    def _resolve_cached(self, kind: str, key: Any, func: Callable[[Any], Any]) -> Any:
+        """Return a memoized resolver result younger than dns_cache_ttl"""
+        now = time.monotonic()
+        with self._dns_lock:
+            entry = self._dns_cache.get((kind, key))
+            if entry and now - entry[0] < self.dns_cache_ttl:
+                return entry[1]
+        
+        # Failures raise and are not cached
+        result = func(key)
+        with self._dns_lock:
+            self._dns_cache[(kind, key)] = (now, result)
+        return result
+    
     def execute(self, command: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute network command"""
         if command in self.commands:
@@ -42,10 +184,11 @@ class NetworkTools:
     def list_interfaces(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """List network interfaces"""
         interfaces = []
+        if_stats = psutil.net_if_stats()
         
         for name, addrs in psutil.net_if_addrs().items():
             # Get interface stats
-            stats = psutil.net_if_stats().get(name)
+            stats = if_stats.get(name)
             
             interface = {
                 'name': name,
@@ -83,19 +226,21 @@ class NetworkTools:
         
         connections = []
         
-        for conn in psutil.net_connections(kind=kind):
-            # Filter by state if specified
-            if state and conn.status != state:
-                continue
-            
+        # Filter by state if specified
+        conns = [conn for conn in psutil.net_connections(kind=kind) if not state or conn.status == state]
+        
+        # Resolve process names in one pass instead of once per connection,
+        # and skip the process walk entirely when no connection has a pid
+        pid_names = {}
+        if any(conn.pid for conn in conns):
+            pid_names = {p.info['pid']: p.info['name'] for p in psutil.process_iter(['pid', 'name'])}
+        
+        for conn in conns:
             # Get process name
-            try:
-                if conn.pid:
-                    process = psutil.Process(conn.pid).name()
-                else:
-                    process = 'System'
-            except:
-                process = 'Unknown'
+            if conn.pid:
+                process = pid_names.get(conn.pid) or 'Unknown'
+            else:
+                process = 'System'
             
             conn_info = {
                 'protocol': 'tcp' if conn.type == socket.SOCK_STREAM else 'udp',
@@ -116,14 +261,14 @@ class NetworkTools:
         """List routing table"""
         routes = []
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Windows route table
             try:
                 output = subprocess.check_output(['route', 'print'], text=True)
                 # Parse Windows route output
                 in_ipv4_table = False
                 
-                for line in output.split('\n'):
+                for line in output.splitlines():
                     if 'IPv4 Route Table' in line:
                         in_ipv4_table = True
                         continue
@@ -142,21 +287,23 @@ class NetworkTools:
                 pass
         else:
             # Unix/Linux route table
+            if PYROUTE2_AVAILABLE:
+                try:
+                    return self._netlink_routes()
+                except:
+                    pass
+            
             try:
                 with open('/proc/net/route', 'r') as f:
-                    lines = f.readlines()[1:]  # Skip header
+                    next(f, None)  # Skip header
                     
-                    for line in lines:
-                        parts = line.strip().split()
+                    for line in f:
+                        parts = line.split()
                         if len(parts) >= 8:
-                            dest = socket.inet_ntoa(struct.pack('<I', int(parts[1], 16)))
-                            gateway = socket.inet_ntoa(struct.pack('<I', int(parts[2], 16)))
-                            mask = socket.inet_ntoa(struct.pack('<I', int(parts[7], 16)))
-                            
                             routes.append({
-                                'destination': dest,
-                                'gateway': gateway,
-                                'netmask': mask,
+                                'destination': _hex_le_to_ip(parts[1]),
+                                'gateway': _hex_le_to_ip(parts[2]),
+                                'netmask': _hex_le_to_ip(parts[7]),
                                 'interface': parts[0],
                                 'metric': parts[6]
                             })
@@ -165,7 +312,7 @@ class NetworkTools:
                 try:
                     output = subprocess.check_output(['netstat', '-rn'], text=True)
                     # Parse netstat output
-                    for line in output.split('\n'):
+                    for line in output.splitlines():
                         parts = line.split()
                         if len(parts) >= 4 and parts[0][0].isdigit():
                             routes.append({
@@ -180,15 +327,50 @@ class NetworkTools:
         
         return routes
     
+    def _netlink_routes(self) -> List[Dict[str, Any]]:
+        """Read the main IPv4 routing table over netlink"""
+        routes = []
+        with IPRoute() as ipr:
+            links = {link['index']: link.get_attr('IFLA_IFNAME') for link in ipr.get_links()}
+            
+            for route in ipr.get_routes(family=socket.AF_INET, table=254):
+                prefix = route['dst_len']
+                mask = (0xffffffff << (32 - prefix)) & 0xffffffff
+                routes.append({
+                    'destination': route.get_attr('RTA_DST') or '0.0.0.0',
+                    'gateway': route.get_attr('RTA_GATEWAY') or '0.0.0.0',
+                    'netmask': f"{mask >> 24}.{(mask >> 16) & 0xff}.{(mask >> 8) & 0xff}.{mask & 0xff}",
+                    'interface': links.get(route.get_attr('RTA_OIF'), ''),
+                    'metric': str(route.get_attr('RTA_PRIORITY') or 0)
+                })
+        
+        return routes
+    
+    def _netlink_neighbours(self) -> List[Dict[str, Any]]:
+        """Read the IPv4 neighbour (ARP) table over netlink"""
+        arp_entries = []
+        with IPRoute() as ipr:
+            links = {link['index']: link.get_attr('IFLA_IFNAME') for link in ipr.get_links()}
+            
+            for neigh in ipr.get_neighbours(family=socket.AF_INET):
+                arp_entries.append({
+                    'ip': neigh.get_attr('NDA_DST'),
+                    'mac': neigh.get_attr('NDA_LLADDR') or '00:00:00:00:00:00',
+                    'type': 'static' if neigh['state'] & NUD_PERMANENT else 'dynamic',
+                    'interface': links.get(neigh['ifindex'], '')
+                })
+        
+        return arp_entries
+    
     def arp_table(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get ARP table"""
         arp_entries = []
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             try:
                 output = subprocess.check_output(['arp', '-a'], text=True)
                 
-                for line in output.split('\n'):
+                for line in output.splitlines():
                     parts = line.strip().split()
                     if len(parts) >= 3 and parts[0][0].isdigit():
                         arp_entries.append({
@@ -200,12 +382,18 @@ class NetworkTools:
             except:
                 pass
         else:
+            if PYROUTE2_AVAILABLE:
+                try:
+                    return self._netlink_neighbours()
+                except:
+                    pass
+            
             try:
                 # Try /proc/net/arp first
                 with open('/proc/net/arp', 'r') as f:
-                    lines = f.readlines()[1:]  # Skip header
+                    next(f, None)  # Skip header
                     
-                    for line in lines:
+                    for line in f:
                         parts = line.split()
                         if len(parts) >= 6:
                             arp_entries.append({
@@ -219,11 +407,10 @@ class NetworkTools:
                 try:
                     output = subprocess.check_output(['arp', '-an'], text=True)
                     
-                    for line in output.split('\n'):
+                    for line in output.splitlines():
                         if '(' in line and ')' in line:
                             # Parse format: hostname (IP) at MAC [ether] on interface
-                            import re
-                            match = re.search(r'\(([^)]+)\) at ([0-9a-fA-F:]+)', line)
+                            match = _ARP_LINE_RE.search(line)
                             if match:
                                 arp_entries.append({
                                     'ip': match.group(1),
@@ -254,7 +441,7 @@ class NetworkTools:
             if record_type in ['A', 'AAAA', 'ANY']:
                 try:
                     # Get all address info
-                    addr_info = socket.getaddrinfo(hostname, None)
+                    addr_info = self._resolve_cached('addrinfo', hostname, lambda h: socket.getaddrinfo(h, None))
                     
                     for family, _, _, _, sockaddr in addr_info:
                         ip = sockaddr[0]
@@ -288,14 +475,36 @@ class NetworkTools:
             # Get MX records (requires dig/nslookup)
             if record_type in ['MX', 'ANY']:
                 try:
-                    if platform.system() == 'Windows':
+                    if _IS_WINDOWS:
                         cmd = ['nslookup', '-type=mx', hostname]
                     else:
                         cmd = ['dig', '+short', 'MX', hostname]
                     
                     output = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
                     
-                    for line in output.strip().split('\n'):
+                    for line in output.strip().splitlines():
+                        if line and not line.startswith(';'):
+                            parts = line.split()
+                            if len(parts) >= 2:
+                                results['records'].append({
+                                    'type': 'MX',
+                                    'priority': parts[0],
+                                    'value': parts[1].rstrip('.')
+                                })
+                except:
+                    pass
+            
+            # Get TXT records
+            if record_type in ['TXT', 'ANY']:
+                try:
+                    if _IS_WINDOWS:
+                        cmd = ['nslookup', '-type=txt', hostname]
+                    else:
+                        cmd = ['dig', '+short', 'TXT', hostname]
+                    
+                    output = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
+                    
+                    for line in output.strip().splitlines():
                         if line and line.startswith('"'):
                             results['records'].append({
                                 'type': 'TXT',
@@ -319,7 +528,7 @@ class NetworkTools:
             raise Exception("Host parameter required")
         
         # Construct ping command
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             cmd = ['ping', '-n', str(count), '-w', str(timeout * 1000), host]
         else:
             cmd = ['ping', '-c', str(count), '-W', str(timeout), host]
@@ -328,7 +537,7 @@ class NetworkTools:
             output = subprocess.check_output(cmd, text=True, stderr=subprocess.STDOUT)
             
             # Parse ping output
-            lines = output.strip().split('\n')
+            lines = output.strip().splitlines()
             
             # Extract statistics
             stats = {
@@ -345,19 +554,17 @@ class NetworkTools:
             # Parse statistics line
             for line in lines:
                 if 'packets transmitted' in line or 'Packets: Sent' in line:
-                    import re
                     # Unix: X packets transmitted, Y received
                     # Windows: Packets: Sent = X, Received = Y
-                    numbers = re.findall(r'\d+', line)
+                    numbers = _PING_STATS_RE.findall(line)
                     if len(numbers) >= 2:
                         stats['sent'] = int(numbers[0])
                         stats['received'] = int(numbers[1])
                         stats['lost'] = stats['sent'] - stats['received']
                 
                 elif 'min/avg/max' in line or 'Minimum/Maximum/Average' in line:
-                    import re
                     # Extract RTT values
-                    numbers = re.findall(r'[\d.]+', line)
+                    numbers = _RTT_STATS_RE.findall(line)
                     if len(numbers) >= 3:
                         stats['min'] = float(numbers[0])
                         stats['avg'] = float(numbers[1]) if len(numbers) > 1 else 0
@@ -392,62 +599,76 @@ class NetworkTools:
         hops = []
         
         # Construct traceroute command
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             cmd = ['tracert', '-h', str(max_hops), '-w', str(timeout * 1000), host]
         else:
             cmd = ['traceroute', '-m', str(max_hops), '-w', str(timeout), host]
         
+        # Resolve the destination so we can stop as soon as it answers
+        try:
+            target_ip = self._resolve_cached('A', host, socket.gethostbyname)
+        except OSError:
+            target_ip = None
+        
         try:
-            # Run traceroute
-            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            # Run traceroute, line buffered so hops arrive as they complete
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
             
             hop_num = 0
-            for line in proc.stdout:
+            for line in iter(proc.stdout.readline, ''):
                 line = line.strip()
                 
                 # Skip header lines
                 if not line or 'traceroute' in line.lower() or 'tracing' in line.lower():
                     continue
                 
-                # Parse hop line
-                import re
-                
-                # Look for hop number at start of line
-                match = re.match(r'^\s*(\d+)', line)
-                if match:
-                    hop_num = int(match.group(1))
-                    
-                    # Extract IPs and RTTs from line
-                    ip_pattern = r'(\d+\.\d+\.\d+\.\d+)'
-                    rtt_pattern = r'([\d.]+)\s*ms'
-                    
-                    ips = re.findall(ip_pattern, line)
-                    rtts = re.findall(rtt_pattern, line)
+                parsed = _parse_hop(line)
+                if parsed:
+                    hop_num, ips, rtts = parsed
                     
                     hop = {
                         'hop': hop_num,
                         'ip': ips[0] if ips else None,
                         'hostname': None,
-                        'rtts': [float(rtt) for rtt in rtts],
+                        'rtts': rtts,
                         'timeout': '*' in line
                     }
                     
-                    # Try to get hostname
-                    if hop['ip']:
-                        try:
-                            hostname, _, _ = socket.gethostbyaddr(hop['ip'])
-                            hop['hostname'] = hostname
-                        except:
-                            pass
-                    
                     hops.append(hop)
+                    
+                    if target_ip and hop['ip'] == target_ip:
+                        break
+            
+            # Stop the trace if we left early, without leaking the process
+            if proc.poll() is None:
+                proc.terminate()
+            try:
+                proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            
+            # Resolve hop hostnames together once the trace is done
+            hop_ips = list({hop['ip'] for hop in hops if hop['ip']})
+            if hop_ips:
+                with ThreadPoolExecutor(max_workers=min(TRACEROUTE_PTR_WORKERS, len(hop_ips))) as executor:
+                    hostnames = dict(zip(hop_ips, executor.map(self._reverse_lookup, hop_ips)))
+                for hop in hops:
+                    if hop['ip']:
+                        hop['hostname'] = hostnames[hop['ip']]
             
-            proc.wait()
             return hops
             
         except Exception as e:
             raise Exception(f"Traceroute failed: {e}")
     
+    def _reverse_lookup(self, ip: str) -> Optional[str]:
+        """PTR lookup through the resolver cache, None if it fails"""
+        try:
+            return self._resolve_cached('PTR', ip, socket.gethostbyaddr)[0]
+        except:
+            return None
+    
     def port_scan(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Scan ports on a host"""
         host = params.get('target')
@@ -480,70 +701,126 @@ class NetworkTools:
         if len(port_list) > max_ports:
             port_list = list(port_list)[:max_ports]
         
-        results = []
-        
         # Resolve hostname to IP
         try:
-            target_ip = socket.gethostbyname(host)
+            target_ip = self._resolve_cached('A', host, socket.gethostbyname)
         except socket.gaierror:
             raise Exception(f"Cannot resolve hostname: {host}")
         
-        # Scan ports
+        # Connect to every port at once, then grab banners from the open ones
+        open_socks = self._connect_ports(target_ip, port_list, timeout)
+        try:
+            banners = {}
+            if open_socks:
+                workers = min(PORT_SCAN_WORKERS, len(open_socks))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    banners = dict(zip(open_socks, executor.map(
+                        lambda item: self._grab_banner(item[1], item[0], timeout), open_socks.items())))
+        finally:
+            for sock in open_socks.values():
+                sock.close()
+        
+        results = []
         for port in port_list:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            
             result = {
                 'port': port,
-                'open': False,
+                'open': port in open_socks,
                 'service': self._get_service_name(port)
             }
-            
-            try:
-                # Attempt connection
-                sock.connect((target_ip, port))
-                result['open'] = True
-                
-                # Try to grab banner
-                try:
-                    sock.send(b'HEAD / HTTP/1.0\r\n\r\n')
-                    banner = sock.recv(1024).decode('utf-8', errors='ignore')
-                    if banner:
-                        result['banner'] = banner.strip()
-                except:
-                    pass
-                
-            except (socket.timeout, socket.error):
-                pass
-            finally:
-                sock.close()
-            
+            if banners.get(port):
+                result['banner'] = banners[port]
             results.append(result)
         
         return results
     
+    def _connect_ports(self, target_ip: str, port_list, timeout: float) -> Dict[int, socket.socket]:
+        """Non-blocking connect to each port and return sockets that connected"""
+        fd_budget = PORT_SCAN_MAX_SOCKETS
+        if resource:
+            try:
+                soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+                if soft_limit != resource.RLIM_INFINITY:
+                    fd_budget = max(1, min(fd_budget, soft_limit - 64))
+            except (ValueError, OSError):
+                pass
+        
+        port_list = list(port_list)
+        open_socks = {}
+        i = 0
+        
+        while i < len(port_list):
+            # Connected sockets stay open for banner grabbing, so they count
+            # against the budget of every later batch
+            batch_size = max(1, fd_budget - len(open_socks))
+            batch = port_list[i:i + batch_size]
+            i += batch_size
+            
+            with selectors.DefaultSelector() as selector:
+                pending = {}
+                try:
+                    for port in batch:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                        sock.setblocking(False)
+                        try:
+                            sock.connect((target_ip, port))
+                            open_socks[port] = sock
+                        except BlockingIOError:
+                            selector.register(sock, selectors.EVENT_WRITE, port)
+                            pending[port] = sock
+                        except OSError:
+                            sock.close()
+                    
+                    # Writable means the handshake finished; SO_ERROR says how
+                    deadline = time.monotonic() + timeout
+                    while pending:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        for key, _ in selector.select(remaining):
+                            sock = key.fileobj
+                            selector.unregister(sock)
+                            del pending[key.data]
+                            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                                open_socks[key.data] = sock
+                            else:
+                                sock.close()
+                finally:
+                    # Anything still pending timed out
+                    for sock in pending.values():
+                        sock.close()
+        
+        return open_socks
+    
+    def _grab_banner(self, sock: socket.socket, port: int, timeout: float) -> Optional[str]:
+        """Read a connected service's banner, probing with HEAD only when needed"""
+        service = self._get_service_name(port)
+        try:
+            if service in GREETING_SERVICES:
+                # These speak first; sending a request would only cost a round trip
+                sock.settimeout(timeout)
+            elif service in HTTP_SERVICES:
+                sock.settimeout(timeout)
+                sock.send(HTTP_PROBE)
+            else:
+                # Give unknown services a brief chance to greet before probing
+                sock.settimeout(min(timeout, BANNER_GREETING_TIMEOUT))
+                try:
+                    banner = sock.recv(1024)
+                except socket.timeout:
+                    banner = b''
+                if banner:
+                    return banner.decode('utf-8', errors='ignore').strip() or None
+                sock.settimeout(timeout)
+                sock.send(HTTP_PROBE)
+            
+            banner = sock.recv(1024).decode('utf-8', errors='ignore')
+            return banner.strip() or None
+        except:
+            return None
+    
     def _get_service_name(self, port: int) -> str:
         """Get common service name for port"""
-        common_ports = {
-            21: 'FTP',
-            22: 'SSH',
-            23: 'Telnet',
-            25: 'SMTP',
-            53: 'DNS',
-            80: 'HTTP',
-            110: 'POP3',
-            143: 'IMAP',
-            443: 'HTTPS',
-            445: 'SMB',
-            3306: 'MySQL',
-            3389: 'RDP',
-            5432: 'PostgreSQL',
-            5900: 'VNC',
-            8080: 'HTTP-Alt',
-            8443: 'HTTPS-Alt'
-        }
-        
-        return common_ports.get(port, 'Unknown')
+        return _SERVICES.get(port, 'Unknown')
     
     def netstat(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Get network statistics"""
@@ -575,14 +852,7 @@ class NetworkTools:
         }
         
         # Get connection statistics by state
-        conn_stats = {}
-        for conn in psutil.net_connections():
-            state = conn.status
-            if state not in conn_stats:
-                conn_stats[state] = 0
-            conn_stats[state] += 1
-        
-        stats['connections'] = conn_stats
+        stats['connections'] = dict(Counter(conn.status for conn in psutil.net_connections(kind='inet')))
         
         return stats
     
@@ -608,8 +878,6 @@ class NetworkTools:
         if not subnet:
             raise Exception("Could not determine local subnet")
         
-        hosts = []
-        
         try:
             network = ipaddress.ip_network(subnet)
             
@@ -617,71 +885,77 @@ class NetworkTools:
             if network.num_addresses > 256:
                 raise Exception("Subnet too large (max /24)")
             
-            # Ping sweep
-            for ip in network.hosts():
-                ip_str = str(ip)
-                
-                # Quick ping check
-                if platform.system() == 'Windows':
-                    cmd = ['ping', '-n', '1', '-w', '100', ip_str]
+            ips = [str(ip) for ip in network.hosts()]
+            
+            # Ping sweep; fping probes every address from one process,
+            # otherwise run the ping probes concurrently
+            alive = self._fping_sweep(ips)
+            with ThreadPoolExecutor(max_workers=HOST_SWEEP_WORKERS) as executor:
+                if alive is None:
+                    probes = list(executor.map(self._probe_host, ips))
                 else:
-                    cmd = ['ping', '-c', '1', '-W', '1', ip_str]
+                    probes = list(executor.map(self._host_entry, [ip for ip in ips if ip in alive]))
+            
+            hosts = [host for host in probes if host]
+            
+            # Get MAC addresses from one ARP snapshot, now that the sweep
+            # has populated it
+            if hosts:
+                arp_map = {}
+                for arp_entry in self.arp_table({}):
+                    arp_map.setdefault(arp_entry['ip'], arp_entry['mac'])
                 
-                try:
-                    subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-                    
-                    # Host is up, get hostname
-                    try:
-                        hostname, _, _ = socket.gethostbyaddr(ip_str)
-                    except:
-                        hostname = None
-                    
-                    # Get MAC address from ARP
-                    mac = None
-                    for arp_entry in self.arp_table({}):
-                        if arp_entry['ip'] == ip_str:
-                            mac = arp_entry['mac']
-                            break
-                    
-                    hosts.append({
-                        'ip': ip_str,
-                        'hostname': hostname,
-                        'mac': mac,
-                        'alive': True
-                    })
-                    
-                except subprocess.CalledProcessError:
-                    pass
+                for host in hosts:
+                    host['mac'] = arp_map.get(host['ip'])
             
             return hosts
             
         except Exception as e:
             raise Exception(f"Host discovery failed: {e}")
     
+    def _probe_host(self, ip_str: str) -> Optional[Dict[str, Any]]:
+        """Ping one address, returning its host entry if it answers"""
+        # Quick ping check
+        try:
+            subprocess.check_output(_PROBE_PING_CMD + [ip_str], stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError:
+            return None
+        
+        return self._host_entry(ip_str)
+    
+    def _fping_sweep(self, ips: List[str]) -> Optional[set]:
+        """Return the addresses that answer fping, or None if fping is unusable"""
+        fping = shutil.which('fping')
+        if not fping or not ips:
+            return None
+        
+        try:
+            proc = subprocess.run([fping, '-a', '-r', '1', '-t', '1000'] + ips,
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError:
+            return None
+        
+        # Exit status 1 only means some targets were unreachable
+        if proc.returncode > 1:
+            return None
+        return set(proc.stdout.split())
+    
+    def _host_entry(self, ip_str: str) -> Dict[str, Any]:
+        """Build the host entry for an address known to be up"""
+        try:
+            hostname, _, _ = socket.gethostbyaddr(ip_str)
+        except:
+            hostname = None
+        
+        return {
+            'ip': ip_str,
+            'hostname': hostname,
+            'mac': None,
+            'alive': True
+        }
+    
     def port_forward(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Set up port forwarding (placeholder)"""
         # This would require more complex implementation
         # involving raw sockets or iptables manipulation
-        raise Exception("Port forwarding not implemented in this version"):
-                        if line and not line.startswith(';'):
-                            parts = line.split()
-                            if len(parts) >= 2:
-                                results['records'].append({
-                                    'type': 'MX',
-                                    'priority': parts[0],
-                                    'value': parts[1].rstrip('.')
-                                })
-                except:
-                    pass
-            
-            # Get TXT records
-            if record_type in ['TXT', 'ANY']:
-                try:
-                    if platform.system() == 'Windows':
-                        cmd = ['nslookup', '-type=txt', hostname]
-                    else:
-                        cmd = ['dig', '+short', 'TXT', hostname]
-                    
-                    output = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
-                    
-                    for line in output.strip().split('\n
+        raise Exception("Port forwarding not implemented in this version")
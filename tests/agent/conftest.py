@@ -0,0 +1,44 @@
+import importlib.util
+import os
+
+import pytest
+
+AGENT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'agent')
+
+
+def load_agent_module(relpath: str, name: str):
+    """Load one agent source file directly, bypassing the package __init__ chain"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(AGENT_DIR, relpath))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def file_operations():
+    return load_agent_module(os.path.join('modules', 'file_operations.py'), 'agent_file_operations')
+
+
+@pytest.fixture
+def file_ops(file_operations):
+    return file_operations.FileOperations(None)
+
+
+@pytest.fixture(scope='session')
+def crypto():
+    return load_agent_module(os.path.join('core', 'crypto.py'), 'agent_crypto')
+
+
+@pytest.fixture
+def manager(crypto):
+    return crypto.CryptoManager('test-key')
+
+
+@pytest.fixture(scope='session')
+def network_tools():
+    return load_agent_module(os.path.join('modules', 'network_tools.py'), 'agent_network_tools')
+
+
+@pytest.fixture(scope='session')
+def network_evasion():
+    return load_agent_module(os.path.join('evasion', 'network_evasion.py'), 'agent_network_evasion')
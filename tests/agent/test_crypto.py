@@ -0,0 +1,126 @@
+import base64
+import binascii
+import threading
+
+import pytest
+
+
+def test_encrypt_data_round_trips_integers_beyond_64_bits(manager):
+    payload = {'big': 2 ** 70, 'neg': -(2 ** 65), 'small': 1}
+    
+    assert manager.decrypt_data(manager.encrypt_data(payload)) == payload
+
+
+def _flip_byte(token: str, index: int) -> str:
+    raw = bytearray(binascii.a2b_base64(token))
+    raw[index] ^= 0x01
+    return binascii.b2a_base64(bytes(raw), newline=False).decode('ascii')
+
+
+@pytest.mark.parametrize('payload', [
+    {'command': 'ls', 'args': ['-la'], 'n': 3},
+    'plain text',
+    '',
+])
+def test_encrypt_data_round_trip(manager, payload):
+    token = manager.encrypt_data(payload)
+    
+    assert isinstance(token, str)
+    assert manager.decrypt_data(token) == payload
+
+
+def test_encrypt_data_bytes_round_trip(manager):
+    assert manager.decrypt_data(manager.encrypt_data(b'raw bytes')) == 'raw bytes'
+
+
+def test_wire_format_is_nonce_then_gcm_ciphertext(crypto, manager):
+    raw = binascii.a2b_base64(manager.encrypt_data('abc'))
+    
+    # 12-byte nonce, 3 bytes of ciphertext, 16-byte GCM tag
+    assert len(raw) == crypto.NONCE_SIZE + 3 + 16
+    # Fresh nonce per message
+    assert manager.encrypt_data('abc') != manager.encrypt_data('abc')
+
+
+def test_same_key_interoperates_and_other_keys_fail(crypto, manager):
+    token = manager.encrypt_data({'x': 1})
+    
+    assert crypto.CryptoManager('test-key').decrypt_data(token) == {'x': 1}
+    with pytest.raises(Exception, match='Decryption failed'):
+        crypto.CryptoManager('other-key').decrypt_data(token)
+
+
+@pytest.mark.parametrize('index', [0, 12, -1])
+def test_tampered_message_is_rejected(manager, index):
+    # Flip a byte in the nonce, the ciphertext and the tag
+    token = _flip_byte(manager.encrypt_data({'secret': 'value'}), index)
+    
+    with pytest.raises(Exception, match='Decryption failed'):
+        manager.decrypt_data(token)
+
+
+def test_session_round_trip(crypto, manager):
+    encoded = manager.generate_session_key()
+    
+    assert len(base64.b64decode(encoded)) == 32
+    assert manager.session_key == base64.b64decode(encoded)
+    
+    token = manager.encrypt_session({'task': 'ping'})
+    assert manager.decrypt_session(token) == {'task': 'ping'}
+    assert manager.decrypt_session(manager.encrypt_session('text')) == 'text'
+    
+    # A peer given the same raw key decrypts it
+    peer = crypto.CryptoManager('unrelated')
+    peer.session_key = base64.b64decode(encoded)
+    assert peer.decrypt_session(token) == {'task': 'ping'}
+
+
+def test_session_tamper_and_missing_key(manager):
+    manager.generate_session_key()
+    token = _flip_byte(manager.encrypt_session('data'), 20)
+    
+    with pytest.raises(Exception, match='Session decryption failed'):
+        manager.decrypt_session(token)
+    
+    manager.session_key = None
+    with pytest.raises(Exception, match='No session key'):
+        manager.encrypt_session('data')
+
+
+def test_session_key_rotation_invalidates_old_messages(manager):
+    manager.generate_session_key()
+    token = manager.encrypt_session('data')
+    manager.generate_session_key()
+    
+    with pytest.raises(Exception, match='Session decryption failed'):
+        manager.decrypt_session(token)
+
+
+def test_derived_key_is_cached_and_stable(crypto):
+    crypto._derive_key.cache_clear()
+    first = crypto._derive_key('k')
+    
+    assert len(first) == 32
+    assert crypto._derive_key('k') is first
+    assert crypto._derive_key.cache_info().hits == 1
+
+
+def test_explicit_keypair_survives_background_keygen(crypto, monkeypatch):
+    release = threading.Event()
+    real_new_key = crypto.CryptoManager._new_rsa_key
+    
+    def new_key(key_size):
+        # Hold the background 2048-bit generation until the explicit call is done
+        if key_size == 2048:
+            release.wait(5)
+        return real_new_key(key_size)
+    
+    monkeypatch.setattr(crypto.CryptoManager, '_new_rsa_key', staticmethod(new_key))
+    manager = crypto.CryptoManager('test-key')
+    manager.generate_rsa_keypair(key_size=1024)
+    release.set()
+    manager._keygen_thread.join(5)
+    
+    assert manager.rsa_private_key.key_size == 1024
+    assert manager.rsa_public_key.public_numbers() == manager.rsa_private_key.public_key().public_numbers()
+    assert 'BEGIN PUBLIC KEY' in manager.get_public_key_pem()
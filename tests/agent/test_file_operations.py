@@ -0,0 +1,157 @@
+import os
+import sys
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='POSIX symlinks')
+def test_delete_symlink_to_critical_file_removes_only_the_link(tmp_path, file_ops):
+    link = tmp_path / 'pylink'
+    link.symlink_to('/usr/bin/env')
+    
+    file_ops.delete_file({'path': str(link)})
+    
+    assert not os.path.lexists(link)
+    assert os.path.exists('/usr/bin/env')
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='POSIX symlinks')
+def test_path_through_symlinked_directory_is_critical(tmp_path, file_ops):
+    link = tmp_path / 'link'
+    link.symlink_to('/etc')
+    
+    with pytest.raises(Exception, match='critical'):
+        file_ops.delete_file({'path': str(link / 'passwd')})
+    assert os.path.exists('/etc/passwd')
+    
+    # The link itself lives outside any critical directory
+    assert not file_ops._is_critical_path(str(link))
+
+
+def _make_tree(root):
+    """A small tree mixing compressible, incompressible and empty files"""
+    src = root / 'src'
+    (src / 'sub').mkdir(parents=True)
+    (src / 'text.txt').write_bytes(b'hello world\n' * 5000)
+    (src / 'random.bin').write_bytes(os.urandom(300000))
+    (src / 'empty').write_bytes(b'')
+    (src / 'sub' / 'nested.txt').write_bytes(b'nested\n' * 100)
+    return src
+
+
+def _read_tree(root):
+    return {
+        os.path.relpath(os.path.join(dirpath, name), root): open(os.path.join(dirpath, name), 'rb').read()
+        for dirpath, _, names in os.walk(root)
+        for name in names
+    }
+
+
+@pytest.mark.parametrize('raw_write', [True, False])
+@pytest.mark.parametrize('compresslevel', [3, None, 9])
+def test_zip_files_parallel_deflate_round_trip(tmp_path, file_operations, file_ops, monkeypatch, compresslevel, raw_write):
+    # A tiny byte window and size cap exercise both the window flushing and
+    # the zf.write fallback for large members
+    monkeypatch.setattr(file_operations, 'ZIP_WINDOW_MAX_BYTES', 100000)
+    monkeypatch.setattr(file_operations, 'ZIP_PARALLEL_MAX_SIZE', 200000)
+    if raw_write:
+        with zipfile.ZipFile(tmp_path / 'probe.zip', 'w') as zf:
+            assert file_operations._can_write_deflated(zf)
+    else:
+        # As if zipfile no longer had the internals _write_deflated uses
+        monkeypatch.setattr(file_operations, '_can_write_deflated', lambda zf: False)
+    src = _make_tree(tmp_path)
+    archive = tmp_path / 'out.zip'
+    
+    file_ops.zip_files({'paths': [str(src)], 'output': str(archive), 'compresslevel': compresslevel})
+    
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.testzip() is None
+        assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_DEFLATED}
+        members = {info.filename: zf.read(info) for info in zf.infolist()}
+    
+    expected = {os.path.join('src', name): data for name, data in _read_tree(src).items()}
+    assert members == expected
+
+
+def test_zip_unzip_round_trip(tmp_path, file_ops):
+    src = _make_tree(tmp_path)
+    # Repetitive text deflates far past UNZIP_MAX_RATIO but must round-trip
+    (src / 'log.txt').write_bytes(b'2024-01-01 INFO ok\n' * 160000)
+    archive = tmp_path / 'out.zip'
+    dest = tmp_path / 'dest'
+    
+    file_ops.zip_files({'paths': [str(src)], 'output': str(archive)})
+    skipped = []
+    extracted = file_ops.unzip_file({'archive': str(archive), 'destination': str(dest)}, skipped)
+    
+    assert skipped == []
+    assert isinstance(extracted, list) and len(extracted) == 5
+    assert _read_tree(dest / 'src') == _read_tree(src)
+
+
+def test_unzip_skips_only_suspicious_members(tmp_path, file_operations, file_ops, monkeypatch):
+    monkeypatch.setattr(file_operations, 'UNZIP_RATIO_MIN_SIZE', 1024)
+    archive = tmp_path / 'bomb.zip'
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('zeros', b'\0' * (1024 * 1024))
+        zf.writestr('ok.bin', os.urandom(4096))
+    dest = tmp_path / 'dest'
+    
+    skipped = []
+    extracted = file_ops.unzip_file({'archive': str(archive), 'destination': str(dest)}, skipped)
+    
+    assert [entry['name'] for entry in skipped] == ['zeros']
+    assert extracted == [os.path.join(str(dest), 'ok.bin')]
+    assert os.listdir(dest) == ['ok.bin']
+    
+    # The check can be disabled per call
+    skipped = []
+    file_ops.unzip_file({'archive': str(archive), 'destination': str(dest), 'max_ratio': 0}, skipped)
+    assert skipped == []
+    assert (dest / 'zeros').stat().st_size == 1024 * 1024
+
+
+def test_upload_file_writes_downloaded_bytes(tmp_path, file_operations):
+    payload = os.urandom(70000)
+    agent = SimpleNamespace(comm=SimpleNamespace(download_file=lambda file_id: payload))
+    destination = tmp_path / 'sub' / 'payload.bin'
+    
+    result = file_operations.FileOperations(agent).upload_file({'file_id': 'abc', 'destination': str(destination)})
+    
+    assert result['size'] == len(payload)
+    assert destination.read_bytes() == payload
+
+
+def test_unzip_contains_members_to_destination(tmp_path, file_ops):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    archive = tmp_path / 'evil.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('../escape.txt', b'x')
+        zf.writestr('/abs.txt', b'x')
+        zf.writestr('link/through.txt', b'x')
+        zf.writestr('C:drive.txt', b'x')
+        zf.writestr('fine.txt', b'ok')
+    
+    if hasattr(os, 'symlink'):
+        (dest / 'link').symlink_to(outside)
+    
+    skipped = []
+    extracted = file_ops.unzip_file({'archive': str(archive), 'destination': str(dest)}, skipped)
+    
+    skipped_names = {entry['name'] for entry in skipped}
+    assert {'../escape.txt', '/abs.txt', 'link/through.txt'} <= skipped_names
+    assert os.path.join(str(dest), 'fine.txt') in extracted
+    assert os.listdir(outside) == []
+    assert not (tmp_path / 'escape.txt').exists()
+    
+    # Whatever was extracted (including 'C:drive.txt' on POSIX, where it is a
+    # plain file name) stays under the destination
+    real_dest = os.path.realpath(str(dest))
+    for path in extracted:
+        assert os.path.commonpath([real_dest, os.path.realpath(path)]) == real_dest
@@ -0,0 +1,20 @@
+import socket
+
+
+def test_parallel_connect_drops_immediate_failures(network_evasion):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+    port = server.getsockname()[1]
+    
+    try:
+        # The broadcast address fails in connect() itself rather than later
+        connected = network_evasion._parallel_connect(
+            [('255.255.255.255', 80), ('127.0.0.1', port)], timeout=2.0)
+        try:
+            assert [s.getpeername() for s in connected] == [('127.0.0.1', port)]
+        finally:
+            for s in connected:
+                s.close()
+    finally:
+        server.close()
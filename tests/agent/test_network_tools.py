@@ -0,0 +1,34 @@
+import pytest
+
+
+def test_service_names_use_one_spelling(network_tools):
+    tools = network_tools.NetworkTools(None)
+    
+    assert tools._get_service_name(22) == 'SSH'
+    assert tools._get_service_name(8080) == 'HTTP-Alt'
+    assert tools._get_service_name(70000) == 'Unknown'
+    
+    # Names from the services file are upper-cased like the built-in ones,
+    # so the banner probe sets recognise them
+    curated = set(network_tools.COMMON_PORTS.values())
+    for name in set(network_tools._SERVICES.values()) - curated:
+        assert name == name.upper()
+
+
+@pytest.mark.parametrize('line, expected', [
+    # Linux traceroute, numeric
+    (' 1  192.168.1.1  0.412 ms  0.380 ms  0.351 ms', (1, ['192.168.1.1'], [0.412, 0.38, 0.351])),
+    # No reply from the hop
+    (' 2  * * *', (2, [], [])),
+    # Resolved name with the address in parentheses
+    (' 3  router.example.net (10.0.0.1)  12.5 ms  11.9 ms  12.1 ms', (3, ['10.0.0.1'], [12.5, 11.9, 12.1])),
+    # Windows tracert, sub-millisecond replies and a lost probe
+    ('  1    <1 ms    <1 ms    <1 ms  192.168.1.1', (1, ['192.168.1.1'], [1.0, 1.0, 1.0])),
+    ('  4    12 ms    11 ms     *     gw.example.com [203.0.113.5]', (4, ['203.0.113.5'], [12.0, 11.0])),
+    # Header and blank lines are not hops
+    ('traceroute to example.com (93.184.216.34), 30 hops max, 60 byte packets', None),
+    ('Tracing route to example.com [93.184.216.34]', None),
+    ('', None),
+])
+def test_parse_hop(network_tools, line, expected):
+    assert network_tools._parse_hop(line) == expected